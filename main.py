@@ -8,7 +8,9 @@ def main():
     parser = argparse.ArgumentParser(description="Sales Call Analyzer")
     parser.add_argument("inputs", nargs="+", help="Input MP3 files")
     parser.add_argument("--out", default="outputs", help="Output directory")
-    parser.add_argument("--backend", default="faster", choices=["faster","openai"], help="Transcription backend")
+    parser.add_argument("--backend", default="faster", choices=["faster","openai","auto"], help="Transcription backend")
+    parser.add_argument("--worker-socket", default=None, help="Unix socket of a running transcription worker")
+    parser.add_argument("--fingerprint-db", default=None, help="Audio fingerprint index used to detect duplicate calls")
     args = parser.parse_args()
 
     out_root = Path(args.out)
@@ -16,9 +18,14 @@ def main():
 
     results = []
     for input_path in args.inputs:
-        call_json, pdf_path = process_call(input_path, out_root, backend=args.backend)
+        call_json, pdf_path = process_call(input_path, out_root, backend=args.backend, worker_socket=args.worker_socket, fingerprint_db=args.fingerprint_db)
         results.append({"input": input_path, "json": call_json["output_json_path"], "pdf": str(pdf_path)})
 
+    export_dir = os.getenv("ANALYTICS_EXPORT_DIR")
+    if export_dir:
+        from sales_call_analyzer.export import env_options, flush
+        flush(export_dir, fmt=env_options()["fmt"])
+
     print(json.dumps({"results": results}, ensure_ascii=False))
 
 if __name__ == "__main__":
@@ -7,9 +7,17 @@ def align_transcript_to_speakers(transcript_segments, speaker_segments):
     si = 0
     for t in transcript_segments:
         ts = t.get("start", 0.0)
+        te = max(t.get("end", 0.0), ts)
         while si + 1 < len(speaker_segments) and speaker_segments[si]["end"] < ts:
             si += 1
         spk = speaker_segments[min(si, len(speaker_segments) - 1)]["speaker"]
+        overlap = {}
+        j = si
+        while j < len(speaker_segments) and speaker_segments[j]["start"] < te:
+            seg = speaker_segments[j]
+            overlap[seg["speaker"]] = overlap.get(seg["speaker"], 0.0) + max(0.0, min(te, seg["end"]) - max(ts, seg["start"]))
+            j += 1
+        if overlap and max(overlap.values()) > 0:
+            spk = max(overlap.items(), key=lambda x: x[1])[0]
         out.append({"start": t.get("start", 0.0), "end": t.get("end", 0.0), "speaker": spk, "text": t["text"]})
     return out
-
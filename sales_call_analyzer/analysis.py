@@ -1,7 +1,7 @@
 from collections import defaultdict
 from pathlib import Path
 from sales_call_analyzer.keywords import POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS
-from sales_call_analyzer.utils import language_split, is_question, extract_numbers_with_context, sentiment_score
+from sales_call_analyzer.utils import analyze_text, language_percentages, sentiment_score
 
 def assign_roles(labeled_segments):
     by_spk = defaultdict(list)
@@ -20,24 +20,30 @@ def assign_roles(labeled_segments):
         roles[spk] = "SALES_PERSON" if spk == sales else "CLIENT"
     return roles
 
-def analyze_metrics(labeled_segments, input_path):
+def talk_time_seconds(speaker_segments, roles):
+    totals = defaultdict(float)
+    for s in speaker_segments or []:
+        totals[roles.get(s["speaker"], s["speaker"])] += max(0.0, s["end"] - s["start"])
+    return {r: round(v, 2) for r, v in totals.items()}
+
+def analyze_metrics(labeled_segments, input_path, speaker_segments=None):
     total_text = " ".join(s["text"] for s in labeled_segments)
     roles = assign_roles(labeled_segments)
-    speakers = set(s["speaker"] for s in labeled_segments)
     talk_counts = defaultdict(int)
-    for s in labeled_segments:
-        r = roles.get(s["speaker"], s["speaker"]) 
-        talk_counts[r] += len(s["text"].split())
-    total_words = sum(talk_counts.values())
-    client_talk_percent = round(100.0 * talk_counts.get("CLIENT", 0) / total_words, 2) if total_words else 0.0
-    sales_talk_percent = round(100.0 * talk_counts.get("SALES_PERSON", 0) / total_words, 2) if total_words else 0.0
     client_questions = 0
     keyword_details = []
     pos_counts = defaultdict(int)
     neg_counts = defaultdict(int)
+    numbers = []
+    hi_words = 0
+    en_words = 0
     for s in labeled_segments:
         role = roles.get(s["speaker"], s["speaker"]) 
-        if role == "CLIENT" and is_question(s["text"]):
+        info = analyze_text(s["text"])
+        talk_counts[role] += info["words"]
+        hi_words += info["hindi_words"]
+        en_words += info["english_words"]
+        if role == "CLIENT" and info["is_question"]:
             client_questions += 1
         lt = s["text"].lower()
         for k in POSITIVE_KEYWORDS:
@@ -48,12 +54,13 @@ def analyze_metrics(labeled_segments, input_path):
             if k.lower() in lt:
                 neg_counts[k] += 1
                 keyword_details.append({"keyword": k, "speaker": role, "context": s["text"]})
-    numbers = []
-    for s in labeled_segments:
-        for n in extract_numbers_with_context(s["text"]):
-            n["speaker"] = roles.get(s["speaker"], s["speaker"]) 
+        for n in info["numbers"]:
+            n["speaker"] = role
             numbers.append(n)
-    lang = language_split(total_text)
+    total_words = sum(talk_counts.values())
+    client_talk_percent = round(100.0 * talk_counts.get("CLIENT", 0) / total_words, 2) if total_words else 0.0
+    sales_talk_percent = round(100.0 * talk_counts.get("SALES_PERSON", 0) / total_words, 2) if total_words else 0.0
+    lang = language_percentages(hi_words, en_words)
     sentiment = sentiment_score(total_text)
     engagement_rating = min(100, int(round((client_talk_percent + client_questions * 5))))
     summary = "Sales call analysis generated."
@@ -76,6 +83,7 @@ def analyze_metrics(labeled_segments, input_path):
             "client_talk_percent": client_talk_percent,
             "sales_talk_percent": sales_talk_percent,
             "engagement_rating": engagement_rating,
+            "talk_time_sec": talk_time_seconds(speaker_segments, roles),
         },
         "keywords": {
             "positive_counts": pos_counts,
@@ -0,0 +1,75 @@
+import hashlib
+import inspect
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+ARTIFACT_DIR = "artifacts"
+MANIFEST = "manifest.json"
+
+
+def config_hash(obj):
+    raw = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def _source_hash(module_name):
+    import importlib
+    return config_hash(inspect.getsource(importlib.import_module(module_name)))
+
+
+def stage_versions(backend="faster"):
+    from sales_call_analyzer.keywords import POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, QUESTION_PATTERNS
+    transcript = config_hash({
+        "backend": backend,
+        "model": "medium",
+        "compute_type": "int8",
+        "vad_filter": True,
+        "trim": os.getenv("TRIM_NON_SPEECH", "").lower() in ("1", "true", "yes"),
+    })
+    speakers = config_hash({
+        "engine": os.getenv("DIARIZE_ENGINE", "cluster"),
+        "source": [_source_hash("sales_call_analyzer.diarize"), _source_hash("sales_call_analyzer.speaker_cluster")],
+    })
+    labeled = config_hash({"transcript": transcript, "speakers": speakers, "source": _source_hash("sales_call_analyzer.align")})
+    metrics = config_hash({
+        "keywords": [POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, QUESTION_PATTERNS],
+        "source": [_source_hash("sales_call_analyzer.analysis"), _source_hash("sales_call_analyzer.utils")],
+    })
+    pdf = config_hash({"metrics": metrics, "source": _source_hash("sales_call_analyzer.pdf_generator")})
+    return {"transcript": transcript, "speakers": speakers, "labeled": labeled, "metrics": metrics, "pdf": pdf}
+
+
+def save_artifact(call_dir, name, version, data):
+    art_dir = Path(call_dir) / ARTIFACT_DIR
+    art_dir.mkdir(parents=True, exist_ok=True)
+    with open(art_dir / f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump({"stage": name, "version": version, "data": data}, f, ensure_ascii=False)
+
+
+def load_artifact(call_dir, name, version=None):
+    path = Path(call_dir) / ARTIFACT_DIR / f"{name}.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        art = json.load(f)
+    if version is not None and art.get("version") != version:
+        return None
+    return art["data"]
+
+
+def write_manifest(call_dir, input_path, stages, backend):
+    art_dir = Path(call_dir) / ARTIFACT_DIR
+    art_dir.mkdir(parents=True, exist_ok=True)
+    with open(art_dir / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump({"input_path": str(input_path), "backend": backend, "stages": stages}, f, ensure_ascii=False, indent=2)
+
+
+def read_manifest(call_dir):
+    path = Path(call_dir) / ARTIFACT_DIR / MANIFEST
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -1,6 +1,80 @@
-def diarize_audio(path):
-    from pydub import AudioSegment, silence
-    audio = AudioSegment.from_file(path)
+CHANNEL_SPEAKERS = ("SPEAKER_0", "SPEAKER_1")
+VAD_RATE = 8000
+CHUNK_FRAMES = 4096
+
+def load_audio(path):
+    from pydub import AudioSegment
+    return AudioSegment.from_file(path)
+
+def _stereo_channels(audio):
+    import numpy as np
+    if audio.channels != 2:
+        return None
+    audio = audio.set_frame_rate(VAD_RATE).set_sample_width(2)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16).reshape(-1, 2)
+    left = samples[:, 0]
+    right = samples[:, 1]
+    if not left.any() or not right.any():
+        return None
+    if np.corrcoef(left[::8].astype(np.float32), right[::8].astype(np.float32))[0, 1] > 0.98:
+        return None
+    return left, right
+
+def channel_vad(samples, sample_rate, frame_ms=30, min_silence_ms=600, min_speech_ms=250):
+    import numpy as np
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    n = len(samples) // frame
+    if n == 0:
+        return []
+    frames = samples[:n * frame].reshape(n, frame)
+    energy = np.empty(n, dtype=np.float32)
+    for start in range(0, n, CHUNK_FRAMES):
+        chunk = frames[start:start + CHUNK_FRAMES].astype(np.float32)
+        energy[start:start + len(chunk)] = 10.0 * np.log10(np.mean(chunk * chunk, axis=1) + 1e-10)
+    thresh = max(np.percentile(energy, 10) + 12.0, energy.max() - 45.0)
+    voiced = np.concatenate(([0], (energy > thresh).astype(np.int8), [0]))
+    edges = np.diff(voiced)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+    keep = (starts[1:] - ends[:-1]) * frame_ms >= min_silence_ms
+    starts = np.concatenate((starts[:1], starts[1:][keep]))
+    ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+    long_enough = (ends - starts) * frame_ms >= min_speech_ms
+    scale = frame_ms / 1000.0
+    return [(round(float(s * scale), 3), round(float(e * scale), 3)) for s, e in zip(starts[long_enough], ends[long_enough])]
+
+def _diarize_channels(audio):
+    channels = _stereo_channels(audio)
+    if channels is None:
+        return None
+    segments = []
+    for speaker, samples in zip(CHANNEL_SPEAKERS, channels):
+        for start, end in channel_vad(samples, VAD_RATE):
+            segments.append({"start": start, "end": end, "speaker": speaker})
+    segments.sort(key=lambda s: (s["start"], s["end"]))
+    return segments
+
+def _diarize_clusters(audio):
+    import numpy as np
+    from sales_call_analyzer.speaker_cluster import SAMPLE_RATE, cluster_speakers
+    mono = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+    pcm = np.frombuffer(mono.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+    return cluster_speakers(pcm)
+
+def diarize_audio(path, audio=None):
+    import os
+    from pydub import silence
+    if audio is None:
+        audio = load_audio(path)
+    segments = _diarize_channels(audio)
+    if segments:
+        return segments
+    if os.getenv("DIARIZE_ENGINE", "cluster") == "cluster":
+        segments = _diarize_clusters(audio)
+        if segments:
+            return segments
     chunks = silence.detect_nonsilent(audio, min_silence_len=600, silence_thresh=audio.dBFS - 16)
     segments = []
     speaker = 0
@@ -10,3 +84,14 @@ def diarize_audio(path):
     if not segments:
         segments.append({"start": 0.0, "end": len(audio) / 1000.0, "speaker": "SPEAKER_0"})
     return segments
+
+def split_channels(path, out_dir):
+    audio = load_audio(path)
+    if _stereo_channels(audio) is None:
+        return None
+    out = []
+    for speaker, mono in zip(CHANNEL_SPEAKERS, audio.split_to_mono()):
+        ch_path = out_dir / f"{speaker.lower()}.wav"
+        mono.export(str(ch_path), format="wav")
+        out.append((speaker, ch_path))
+    return out
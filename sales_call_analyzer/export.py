@@ -0,0 +1,374 @@
+import argparse
+import fcntl
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sales_call_analyzer.analysis import assign_roles
+from sales_call_analyzer.utils import analyze_text
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+TABLES = ("metrics", "segments")
+STAGING = "_staging"
+
+_LOG = logging.getLogger("sales_call_analyzer.export")
+
+
+def _schemas():
+    import pyarrow as pa
+    counts = pa.map_(pa.string(), pa.int64())
+    metrics = pa.schema([
+        ("call_key", pa.string()),
+        ("call_id", pa.string()),
+        ("file_name", pa.string()),
+        ("report_path", pa.string()),
+        ("client_questions", pa.int64()),
+        ("client_talk_percent", pa.float64()),
+        ("sales_talk_percent", pa.float64()),
+        ("engagement_rating", pa.int64()),
+        ("client_talk_sec", pa.float64()),
+        ("sales_talk_sec", pa.float64()),
+        ("positivity_score", pa.int64()),
+        ("hindi_percent", pa.float64()),
+        ("english_percent", pa.float64()),
+        ("positive_counts", counts),
+        ("negative_counts", counts),
+        ("numeric_mentions", pa.int64()),
+        ("recommendations", pa.list_(pa.string())),
+        ("segments", pa.int64()),
+        ("duplicate_similarity", pa.float64()),
+    ])
+    segments = pa.schema([
+        ("call_key", pa.string()),
+        ("call_id", pa.string()),
+        ("segment_index", pa.int32()),
+        ("start", pa.float64()),
+        ("end", pa.float64()),
+        ("speaker", pa.string()),
+        ("role", pa.string()),
+        ("words", pa.int32()),
+        ("is_question", pa.bool_()),
+        ("text", pa.string()),
+    ])
+    return metrics, segments
+
+
+def _get(d, *keys, default=None):
+    for k in keys:
+        if not isinstance(d, dict) or k not in d:
+            return default
+        d = d[k]
+    return d
+
+
+def _call_key(metrics, report_path):
+    return Path(report_path).parent.name if report_path else metrics.get("call_id")
+
+
+def metrics_row(metrics, report_path=""):
+    talk = _get(metrics, "engagement", "talk_time_sec", default={}) or {}
+    return {
+        "call_key": _call_key(metrics, report_path),
+        "call_id": metrics.get("call_id"),
+        "file_name": metrics.get("file_name"),
+        "report_path": str(report_path),
+        "client_questions": _get(metrics, "engagement", "client_questions"),
+        "client_talk_percent": _get(metrics, "engagement", "client_talk_percent"),
+        "sales_talk_percent": _get(metrics, "engagement", "sales_talk_percent"),
+        "engagement_rating": _get(metrics, "engagement", "engagement_rating"),
+        "client_talk_sec": talk.get("CLIENT"),
+        "sales_talk_sec": talk.get("SALES_PERSON"),
+        "positivity_score": _get(metrics, "sentiment", "positivity_score"),
+        "hindi_percent": _get(metrics, "language_usage", "hindi_percent"),
+        "english_percent": _get(metrics, "language_usage", "english_percent"),
+        "positive_counts": list((_get(metrics, "keywords", "positive_counts", default={}) or {}).items()),
+        "negative_counts": list((_get(metrics, "keywords", "negative_counts", default={}) or {}).items()),
+        "numeric_mentions": len(metrics.get("numeric_mentions") or []),
+        "recommendations": list(metrics.get("recommendations") or []),
+        "segments": len(metrics.get("segments") or []),
+        "duplicate_similarity": _get(metrics, "duplicate_of", "similarity"),
+    }
+
+
+def segment_rows(metrics, report_path=""):
+    segments = metrics.get("segments") or []
+    roles = assign_roles(segments)
+    call_key = _call_key(metrics, report_path)
+    rows = []
+    for i, s in enumerate(segments):
+        info = analyze_text(s.get("text", ""))
+        rows.append({
+            "call_key": call_key,
+            "call_id": metrics.get("call_id"),
+            "segment_index": i,
+            "start": s.get("start"),
+            "end": s.get("end"),
+            "speaker": s.get("speaker"),
+            "role": roles.get(s.get("speaker"), s.get("speaker")),
+            "words": info["words"],
+            "is_question": info["is_question"],
+            "text": s.get("text", ""),
+        })
+    return rows
+
+
+def _write(table_dir, date, rows, schema, fmt):
+    import pyarrow as pa
+    if not rows:
+        return None
+    return _write_table(Path(table_dir) / f"date={date}", pa.Table.from_pylist(rows, schema=schema), fmt)
+
+
+def _write_table(part_dir, table, fmt):
+    part_dir.mkdir(parents=True, exist_ok=True)
+    name = f"part-{uuid.uuid4().hex}{FORMATS[fmt]}"
+    tmp = part_dir / f".{name}"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, str(tmp), compression="zstd")
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, str(tmp), compression="zstd")
+    path = part_dir / name
+    os.replace(tmp, path)
+    return path
+
+
+def _read(path, columns=None):
+    if path.suffix == FORMATS["parquet"]:
+        import pyarrow.parquet as pq
+        return pq.read_table(str(path), columns=columns)
+    import pyarrow.feather as feather
+    return feather.read_table(str(path), columns=columns)
+
+
+def _parts(table_dir, fmt):
+    return sorted(Path(table_dir).glob(f"date=*/part-*{FORMATS[fmt]}"), key=lambda p: p.stat().st_mtime_ns)
+
+
+@contextmanager
+def _locked(out_root):
+    """Serialize flushes and compaction across processes sharing one dataset."""
+    staging = Path(out_root) / STAGING
+    staging.mkdir(parents=True, exist_ok=True)
+    with open(staging / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield staging
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def export_calls(items, out_root, fmt="parquet"):
+    metrics_schema, segments_schema = _schemas()
+    by_date = defaultdict(lambda: ([], []))
+    for metrics, date, report_path in items:
+        m_rows, s_rows = by_date[date]
+        m_rows.append(metrics_row(metrics, report_path))
+        s_rows.extend(segment_rows(metrics, report_path))
+    written = []
+    for date, (m_rows, s_rows) in sorted(by_date.items()):
+        written.append(_write(Path(out_root) / "metrics", date, m_rows, metrics_schema, fmt))
+        written.append(_write(Path(out_root) / "segments", date, s_rows, segments_schema, fmt))
+    return [str(p) for p in written if p]
+
+
+def export_call(metrics, out_root, report_path="", fmt="parquet", date=None, batch_size=200, max_age_sec=900.0):
+    """Stage one call and flush the staged calls once there are batch_size of them or the oldest is max_age_sec old.
+
+    Writing each call on its own would leave one tiny file per call in every partition.
+    """
+    date = date or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    staging = Path(out_root) / STAGING
+    staging.mkdir(parents=True, exist_ok=True)
+    key = _call_key(metrics, report_path)
+    tmp = staging / f"{key}.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"date": date, "report_path": str(report_path), "metrics": metrics}, f, ensure_ascii=False)
+    os.replace(tmp, staging / f"{key}.json")
+    if len(list(staging.glob("*.json"))) >= batch_size:
+        return flush(out_root, fmt=fmt)
+    return flush_due(out_root, fmt=fmt, max_age_sec=max_age_sec)
+
+
+def env_options():
+    """export_call keyword arguments from ANALYTICS_EXPORT_FORMAT/_BATCH/_MAX_AGE_SEC."""
+    return {
+        "fmt": os.getenv("ANALYTICS_EXPORT_FORMAT", "parquet"),
+        "batch_size": int(os.getenv("ANALYTICS_EXPORT_BATCH", "200")),
+        "max_age_sec": float(os.getenv("ANALYTICS_EXPORT_MAX_AGE_SEC", "900")),
+    }
+
+
+def flush_due(out_root, fmt="parquet", max_age_sec=900.0):
+    """Flush when the oldest staged call has waited max_age_sec."""
+    ages = []
+    for path in (Path(out_root) / STAGING).glob("*.json"):
+        try:
+            ages.append(time.time() - path.stat().st_mtime)
+        except OSError:
+            continue
+    if ages and max(ages) >= max_age_sec:
+        return flush(out_root, fmt=fmt)
+    return []
+
+
+class ExportFlusher:
+    """Checks staged calls on a timer, so they are written after max_age_sec even when no new call arrives."""
+
+    def __init__(self, out_root, fmt="parquet", max_age_sec=900.0):
+        self.out_root = out_root
+        self.fmt = fmt
+        self.max_age_sec = max_age_sec
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="export-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _loop(self):
+        while not self._stop.wait(max(1.0, min(60.0, self.max_age_sec / 4))):
+            try:
+                flush_due(self.out_root, fmt=self.fmt, max_age_sec=self.max_age_sec)
+            except Exception as exc:
+                _LOG.warning("analytics_flush_failed out=%s error=%s", self.out_root, exc)
+
+
+def flush(out_root, fmt="parquet"):
+    """Write every staged call, one file per table and date."""
+    with _locked(out_root) as staging:
+        items, done = [], []
+        for path in staging.glob("*.json"):
+            try:
+                stat = path.stat()
+                with open(path, "r", encoding="utf-8") as f:
+                    staged = json.load(f)
+            except (OSError, ValueError):
+                continue
+            items.append((staged["metrics"], staged["date"], staged["report_path"]))
+            done.append((path, stat.st_mtime_ns))
+        written = export_calls(items, out_root, fmt=fmt) if items else []
+        for path, mtime_ns in done:
+            try:
+                if path.stat().st_mtime_ns == mtime_ns:
+                    path.unlink()
+            except OSError:
+                pass
+    return written
+
+
+def exported_keys(out_root, fmt="parquet"):
+    """call_key of every call already in the dataset or waiting in staging."""
+    keys = {p.name[:-len(".json")] for p in (Path(out_root) / STAGING).glob("*.json")}
+    for path in _parts(Path(out_root) / "metrics", fmt):
+        keys.update(_read(path, columns=["call_key"]).column("call_key").to_pylist())
+    return keys
+
+
+def compact(out_root, fmt="parquet"):
+    """Rewrite each partition as a single file that keeps only the newest export of every call."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    rewritten = []
+    with _locked(out_root):
+        for table in TABLES:
+            paths = _parts(Path(out_root) / table, fmt)
+            keys = {p: set(_read(p, columns=["call_key"]).column("call_key").to_pylist()) for p in paths}
+            newest = {}
+            for path in paths:
+                for key in keys[path]:
+                    newest[key] = path
+            partitions = defaultdict(list)
+            for path in paths:
+                partitions[path.parent].append(path)
+            for part_dir, files in sorted(partitions.items()):
+                stale = any(newest[key] != path for path in files for key in keys[path])
+                if len(files) < 2 and not stale:
+                    continue
+                tables = []
+                for path in files:
+                    own = [key for key in keys[path] if newest[key] == path]
+                    if own:
+                        data = _read(path)
+                        tables.append(data.filter(pc.is_in(data["call_key"], value_set=pa.array(own, pa.string()))))
+                if tables:
+                    rewritten.append(_write_table(part_dir, pa.concat_tables(tables), fmt))
+                for path in files:
+                    path.unlink()
+    return [str(p) for p in rewritten]
+
+
+def _load_report(path):
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_reports(root):
+    for path in Path(root).rglob("report.json*"):
+        if path.name in ("report.json", "report.json.gz"):
+            yield path
+
+
+def backfill(roots, out_root, fmt="parquet", batch_size=500):
+    """Export stored reports, skipping calls the incremental export already wrote or staged."""
+    exported = exported_keys(out_root, fmt=fmt)
+    batch = []
+    written = []
+    count = 0
+    for root in roots:
+        for path in find_reports(root):
+            if path.parent.name in exported:
+                continue
+            try:
+                metrics = _load_report(path)
+            except (OSError, ValueError):
+                continue
+            date = datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).strftime("%Y-%m-%d")
+            batch.append((metrics, date, path))
+            count += 1
+            if len(batch) >= batch_size:
+                written.extend(export_calls(batch, out_root, fmt=fmt))
+                batch = []
+    if batch:
+        written.extend(export_calls(batch, out_root, fmt=fmt))
+    return count, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill columnar analytics from stored reports")
+    parser.add_argument("roots", nargs="*", default=["outputs"], help="Output directories to scan")
+    parser.add_argument("--out", default="analytics", help="Analytics dataset directory")
+    parser.add_argument("--format", default="parquet", choices=sorted(FORMATS), help="File format")
+    parser.add_argument("--batch-size", type=int, default=500, help="Calls per written file")
+    parser.add_argument("--compact", action="store_true", help="Flush staged calls and merge each partition into one deduplicated file")
+    args = parser.parse_args()
+
+    written = flush(args.out, fmt=args.format)
+    count, files = backfill(args.roots, args.out, fmt=args.format, batch_size=args.batch_size)
+    written.extend(files)
+    summary = {"calls": count, "files": len(written), "out": args.out}
+    if args.compact:
+        summary["compacted_files"] = len(compact(args.out, fmt=args.format))
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 8000
+N_FFT = 512
+HOP = 256
+PEAK_NEIGHBORHOOD = 10
+PEAK_MIN_DB = 15.0
+FAN_OUT = 5
+MAX_DT = 63
+MIN_BIN = 10
+MAX_BIN = 220
+PHASES = 4
+CANDIDATE_HASHES = 500
+CANDIDATES = 5
+DURATION_TOLERANCE = 0.03
+DURATION_SLACK_SEC = 0.5
+MIN_ALIGNED = 20
+INDEX_VERSION = 2
+
+_LOG = logging.getLogger("sales_call_analyzer.fingerprint")
+
+
+def load_pcm(path, sample_rate=SAMPLE_RATE):
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(path).set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _spectrogram(pcm):
+    if len(pcm) < N_FFT:
+        pcm = np.pad(pcm, (0, N_FFT - len(pcm)))
+    frames = np.lib.stride_tricks.sliding_window_view(pcm, N_FFT)[::HOP]
+    spec = np.abs(np.fft.rfft(frames * np.hanning(N_FFT).astype(np.float32), axis=1))
+    return 20.0 * np.log10(spec[:, MIN_BIN:MAX_BIN] + 1e-6)
+
+
+def _local_max(spec, k):
+    out = spec.copy()
+    for axis in (0, 1):
+        src = out.copy()
+        for d in range(1, k + 1):
+            fwd = [slice(None)] * 2
+            bwd = [slice(None)] * 2
+            fwd[axis] = slice(d, None)
+            bwd[axis] = slice(None, -d)
+            np.maximum(out[tuple(bwd)], src[tuple(fwd)], out=out[tuple(bwd)])
+            np.maximum(out[tuple(fwd)], src[tuple(bwd)], out=out[tuple(fwd)])
+    return out
+
+
+def fingerprint_pcm(pcm):
+    spec = _spectrogram(pcm)
+    floor = np.median(spec, axis=1, keepdims=True) + PEAK_MIN_DB
+    peaks = (spec == _local_max(spec, PEAK_NEIGHBORHOOD)) & (spec > floor)
+    t, f = np.nonzero(peaks)
+    order = np.lexsort((f, t))
+    t = t[order].astype(np.int64)
+    f = (f[order] + MIN_BIN).astype(np.int64)
+    hashes = []
+    times = []
+    for d in range(1, FAN_OUT + 1):
+        if len(t) <= d:
+            break
+        dt = t[d:] - t[:-d]
+        ok = (dt > 0) & (dt <= MAX_DT)
+        hashes.append((f[:-d][ok] << 14) | (f[d:][ok] << 6) | dt[ok])
+        times.append(t[:-d][ok])
+    if not hashes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(hashes), np.concatenate(times)
+
+
+def fingerprint_phases(pcm, phases=PHASES):
+    """Fingerprints of pcm started at evenly spaced sub-hop offsets; the first one is unshifted.
+
+    Peaks land in different frames when two copies of a call are not hop-aligned, so a query is
+    matched at every phase and the best one counts.
+    """
+    return [fingerprint_pcm(pcm[k * HOP // phases:]) for k in range(phases)]
+
+
+def fingerprint_file(path):
+    pcm = load_pcm(path)
+    return fingerprint_phases(pcm), len(pcm) / float(SAMPLE_RATE)
+
+
+def _aligned(rows):
+    """Per entry, the most hashes agreeing on one time offset, give or take a frame."""
+    counts = {(entry_id, offset): n for entry_id, offset, n in rows}
+    best = {}
+    for (entry_id, offset), n in counts.items():
+        total = n + counts.get((entry_id, offset - 1), 0) + counts.get((entry_id, offset + 1), 0)
+        if total > best.get(entry_id, 0):
+            best[entry_id] = total
+    return best
+
+
+class FingerprintIndex:
+    def __init__(self, db_path):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            if version:
+                _LOG.warning("fingerprint_index_rebuilt db=%s old_version=%s", db_path, version)
+            self.conn.executescript("DROP TABLE IF EXISTS hashes; DROP TABLE IF EXISTS entries;")
+        self.conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                audio_path TEXT,
+                report_path TEXT,
+                duration REAL,
+                n_hashes INTEGER,
+                created_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS hashes (hash INTEGER, entry_id INTEGER, t INTEGER);
+            CREATE INDEX IF NOT EXISTS hashes_hash_entry ON hashes(hash, entry_id, t);
+            CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER, t INTEGER);
+            PRAGMA user_version = {INDEX_VERSION};
+            """
+        )
+
+    def add(self, audio_path, report_path, hashes, times, duration):
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO entries (audio_path, report_path, duration, n_hashes, created_at) VALUES (?, ?, ?, ?, ?)",
+                (str(audio_path), str(report_path), duration, len(hashes), time.time()),
+            )
+            entry_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO hashes (hash, entry_id, t) VALUES (?, ?, ?)",
+                ((int(h), entry_id, int(t)) for h, t in zip(hashes, times)),
+            )
+        return entry_id
+
+    def _offsets(self, hashes, times, entry_ids=None, min_count=1, durations=None):
+        """(entry_id, offset, count) for every entry/offset pair the query hashes agree on."""
+        sql = "SELECT h.entry_id, h.t - q.t AS offset, COUNT(*) FROM query q JOIN hashes h ON h.hash = q.hash"
+        params = []
+        if entry_ids is not None:
+            sql += f" AND h.entry_id IN ({', '.join('?' * len(entry_ids))})"
+            params.extend(entry_ids)
+        if durations is not None:
+            sql += " AND h.entry_id IN (SELECT id FROM entries WHERE duration BETWEEN ? AND ?)"
+            params.extend(durations)
+        sql += " GROUP BY h.entry_id, offset HAVING COUNT(*) >= ?"
+        params.append(min_count)
+        with self.conn:
+            self.conn.execute("DELETE FROM query")
+            self.conn.executemany("INSERT INTO query (hash, t) VALUES (?, ?)", zip(hashes.tolist(), times.tolist()))
+            return self.conn.execute(sql, params).fetchall()
+
+    def best_match(self, phases, duration=None, tolerance=DURATION_TOLERANCE, min_aligned=MIN_ALIGNED):
+        """Best indexed entry for a query given as fingerprint_phases() output.
+
+        Candidates are picked from an evenly spaced subsample of each phase's hashes, so the
+        shortlist costs the same however long the call is; only those candidates are scored on
+        every hash. Similarity is the share of hashes that line up at one offset. With a query
+        duration, only entries within tolerance of it are considered, and a match needs at least
+        min_aligned hashes at one offset: short queries line up a few dozen hashes by chance.
+        """
+        phases = [(np.asarray(h), np.asarray(t)) for h, t in phases if len(h)]
+        if not phases:
+            return None
+        slack = max(duration * tolerance, DURATION_SLACK_SEC) if duration else 0.0
+        durations = (duration - slack, duration + slack) if duration else None
+        estimates = {}
+        for hashes, times in phases:
+            pick = np.unique(np.linspace(0, len(hashes) - 1, min(len(hashes), CANDIDATE_HASHES)).astype(np.int64))
+            scale = len(hashes) / float(len(pick))
+            offsets = self._offsets(hashes[pick], times[pick], min_count=2, durations=durations)
+            for entry_id, aligned in _aligned(offsets).items():
+                estimates[entry_id] = max(estimates.get(entry_id, 0.0), aligned * scale)
+        if not estimates:
+            return None
+        candidates = sorted(estimates, key=estimates.get, reverse=True)[:CANDIDATES]
+        sizes = dict(self.conn.execute(
+            f"SELECT id, n_hashes FROM entries WHERE id IN ({', '.join('?' * len(candidates))})", candidates
+        ).fetchall())
+        best_id, best_similarity, best_aligned = None, 0.0, 0
+        for hashes, times in phases:
+            for entry_id, aligned in _aligned(self._offsets(hashes, times, candidates)).items():
+                similarity = aligned / float(max(1, min(len(hashes), sizes.get(entry_id, 0))))
+                if aligned >= min_aligned and similarity > best_similarity:
+                    best_id, best_similarity, best_aligned = entry_id, similarity, aligned
+        if best_id is None:
+            return None
+        row = self.conn.execute(
+            "SELECT audio_path, report_path, duration FROM entries WHERE id = ?", (best_id,)
+        ).fetchone()
+        return {
+            "entry_id": best_id,
+            "audio_path": row[0],
+            "report_path": row[1],
+            "duration": row[2],
+            "similarity": round(min(1.0, best_similarity), 4),
+            "aligned": best_aligned,
+        }
@@ -1,31 +1,193 @@
 import os
 import json
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from sales_call_analyzer.transcribe import transcribe_audio
-from sales_call_analyzer.diarize import diarize_audio
+from sales_call_analyzer.diarize import diarize_audio, load_audio, split_channels
 from sales_call_analyzer.align import align_transcript_to_speakers
 from sales_call_analyzer.analysis import analyze_metrics
+from sales_call_analyzer.artifacts import save_artifact, stage_versions, write_manifest
 from sales_call_analyzer.pdf_generator import generate_pdf
-from sales_call_analyzer.utils import timestamp_id, safe_filename
+from sales_call_analyzer.resources import ResourceMeter, check_audio_duration
+from sales_call_analyzer.utils import audio_duration, timestamp_id, safe_filename
 
-def process_call(input_path, out_root, backend="faster"):
+_LOG = logging.getLogger("sales_call_analyzer")
+
+def _find_duplicate(index, phases, duration, threshold):
+    match = index.best_match(phases, duration=duration)
+    if not match or match["similarity"] < threshold or not Path(match["report_path"]).exists():
+        return None
+    return match
+
+def _reuse_report(duplicate, input_path):
+    with open(duplicate["report_path"], "r", encoding="utf-8") as f:
+        metrics = json.load(f)
+    metrics["call_id"] = Path(input_path).stem
+    metrics["file_name"] = Path(input_path).name
+    return metrics
+
+def _emit(progress, stage, percent=None):
+    if progress:
+        progress(stage, percent)
+
+def _percent_reporter(progress, stage):
+    last = [-1.0]
+    def report(percent):
+        percent = round(percent, 0)
+        if percent > last[0]:
+            last[0] = percent
+            _emit(progress, stage, percent)
+    return report
+
+def _run_preview(input_path, audio, on_preview, worker_socket=None, progress=None):
+    _emit(progress, "previewing")
+    try:
+        from sales_call_analyzer.preview import preview_call
+        metrics = preview_call(input_path, audio, worker_socket=worker_socket)
+    except Exception as exc:
+        _LOG.warning("preview_failed input=%s error=%s", input_path, exc)
+        return
+    if metrics:
+        on_preview(metrics)
+
+def process_call(input_path, out_root, backend="faster", worker_socket=None, fingerprint_db=None, reuse_duplicates=None, progress=None, preview=None):
     call_id = timestamp_id()
     base = safe_filename(Path(input_path).stem)
     call_dir = Path(out_root) / f"{base}_{call_id}"
     call_dir.mkdir(parents=True, exist_ok=True)
+    meter = ResourceMeter(progress)
+    progress = meter
 
-    transcript_segments, language_hint = transcribe_audio(input_path, backend=backend)
-    speaker_segments = diarize_audio(input_path)
-    labeled_segments = align_transcript_to_speakers(transcript_segments, speaker_segments)
-    metrics = analyze_metrics(labeled_segments, input_path)
+    index = None
+    duplicate = None
+    fingerprint_db = fingerprint_db or os.getenv("FINGERPRINT_DB")
+    _emit(progress, "decoding")
+    meter.audio_sec = audio_duration(input_path)
+    check_audio_duration(meter.audio_sec)
+    audio = None
+    if preview:
+        audio = load_audio(input_path)
+        meter.audio_sec = len(audio) / 1000.0
+        check_audio_duration(meter.audio_sec)
+    if fingerprint_db:
+        try:
+            from sales_call_analyzer.fingerprint import FingerprintIndex, fingerprint_file
+            index = FingerprintIndex(fingerprint_db)
+            phases, duration = fingerprint_file(input_path)
+            duplicate = _find_duplicate(index, phases, duration, float(os.getenv("FINGERPRINT_SIMILARITY", "0.02")))
+        except Exception as exc:
+            index, duplicate = None, None
+            _LOG.warning("fingerprint_failed input=%s error=%s", input_path, exc)
+    if reuse_duplicates is None:
+        reuse_duplicates = os.getenv("FINGERPRINT_REUSE", "1").lower() in ("1", "true", "yes")
 
+    versions = None
+    if duplicate and reuse_duplicates:
+        metrics = _reuse_report(duplicate, input_path)
+    else:
+        versions = stage_versions(backend)
+        if preview:
+            _run_preview(input_path, audio, preview, worker_socket, progress)
+        metrics = _analyze(input_path, call_dir, versions, backend, worker_socket, progress, audio=audio)
+    if duplicate:
+        metrics["duplicate_of"] = {
+            "report_path": duplicate["report_path"],
+            "audio_path": duplicate["audio_path"],
+            "similarity": duplicate["similarity"],
+            "reused": bool(reuse_duplicates),
+        }
+
+    _emit(progress, "rendering")
+    pdf_path = call_dir / "report.pdf"
+    generate_pdf(metrics, pdf_path)
+
+    metrics["resources"] = meter.summary()
     json_path = call_dir / "report.json"
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(metrics, f, ensure_ascii=False, indent=2)
+    if versions:
+        write_manifest(call_dir, input_path, versions, backend)
 
-    pdf_path = call_dir / "report.pdf"
-    generate_pdf(metrics, pdf_path)
+    export_dir = os.getenv("ANALYTICS_EXPORT_DIR")
+    if export_dir:
+        try:
+            from sales_call_analyzer.export import env_options, export_call
+            export_call(metrics, export_dir, report_path=json_path, **env_options())
+        except Exception as exc:
+            _LOG.warning("analytics_export_failed call_dir=%s error=%s", call_dir, exc)
+
+    if index is not None and not duplicate:
+        try:
+            index.add(input_path, json_path, phases[0][0], phases[0][1], duration)
+        except Exception as exc:
+            _LOG.warning("fingerprint_index_failed input=%s error=%s", input_path, exc)
 
     metrics["output_json_path"] = str(json_path)
     metrics["output_pdf_path"] = str(pdf_path)
     return metrics, pdf_path
+
+def _transcribe_channels(input_path, backend, worker_socket, on_progress=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        channels = split_channels(input_path, Path(tmp))
+        if not channels:
+            return None
+        percents = {spk: 0.0 for spk, _ in channels}
+        def channel_progress(spk):
+            def report(percent):
+                percents[spk] = percent
+                if on_progress:
+                    on_progress(sum(percents.values()) / len(percents))
+            return report
+        with ThreadPoolExecutor(max_workers=len(channels)) as pool:
+            futures = [
+                (spk, pool.submit(transcribe_audio, str(p), backend=backend, worker_socket=worker_socket, on_progress=channel_progress(spk)))
+                for spk, p in channels
+            ]
+            labeled = []
+            for spk, fut in futures:
+                segments, _ = fut.result()
+                labeled.extend({"start": s.get("start", 0.0), "end": s.get("end", 0.0), "speaker": spk, "text": s["text"]} for s in segments)
+    labeled.sort(key=lambda s: (s["start"], s["end"]))
+    return labeled
+
+def _analyze(input_path, call_dir, versions, backend, worker_socket, progress=None, audio=None):
+    _emit(progress, "diarizing")
+    speaker_segments = diarize_audio(input_path, audio=audio)
+    save_artifact(call_dir, "speakers", versions["speakers"], speaker_segments)
+    labeled_segments = None
+    _emit(progress, "transcribing", 0.0)
+    on_progress = _percent_reporter(progress, "transcribing")
+    if os.getenv("TRANSCRIBE_CHANNELS_PARALLEL", "").lower() in ("1", "true", "yes"):
+        labeled_segments = _transcribe_channels(input_path, backend, worker_socket, on_progress)
+        if labeled_segments is not None:
+            save_artifact(call_dir, "transcript", versions["transcript"], {"segments": labeled_segments, "language": None})
+    routing = None
+    trim_stats = None
+    if labeled_segments is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            transcribe_path, timeline = input_path, None
+            if os.getenv("TRIM_NON_SPEECH", "").lower() in ("1", "true", "yes"):
+                from sales_call_analyzer.trim import trim_non_speech
+                transcribe_path = str(Path(tmp) / "speech.wav")
+                timeline, trim_stats = trim_non_speech(input_path, transcribe_path)
+            if backend == "auto":
+                from sales_call_analyzer.routing import get_router
+                from sales_call_analyzer.utils import audio_duration
+                duration = trim_stats["kept_sec"] if trim_stats else audio_duration(transcribe_path)
+                (transcript_segments, language_hint), routing = get_router().transcribe(transcribe_path, duration, on_progress=on_progress, worker_socket=worker_socket)
+            else:
+                transcript_segments, language_hint = transcribe_audio(transcribe_path, backend=backend, worker_socket=worker_socket, on_progress=on_progress)
+        if timeline is not None:
+            transcript_segments = timeline.remap_segments(transcript_segments)
+        save_artifact(call_dir, "transcript", versions["transcript"], {"segments": transcript_segments, "language": language_hint, "trim": trim_stats})
+        labeled_segments = align_transcript_to_speakers(transcript_segments, speaker_segments)
+    save_artifact(call_dir, "labeled", versions["labeled"], labeled_segments)
+    _emit(progress, "analyzing")
+    metrics = analyze_metrics(labeled_segments, input_path, speaker_segments=speaker_segments)
+    if routing:
+        metrics["routing"] = routing
+    if trim_stats:
+        metrics["trim"] = trim_stats
+    return metrics
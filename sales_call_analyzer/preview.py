@@ -0,0 +1,63 @@
+import os
+import tempfile
+from pathlib import Path
+
+from sales_call_analyzer.align import align_transcript_to_speakers
+from sales_call_analyzer.analysis import analyze_metrics
+from sales_call_analyzer.diarize import diarize_audio
+from sales_call_analyzer.transcribe import _try_faster_whisper
+from sales_call_analyzer.trim import SAMPLE_RATE, TimelineMap
+
+
+def sample_windows(duration, head_sec=120.0, window_sec=20.0, windows=6):
+    if duration <= head_sec + window_sec * windows:
+        return [(0.0, round(duration, 3))]
+    out = [(0.0, head_sec)]
+    step = (duration - head_sec) / windows
+    for i in range(windows):
+        start = head_sec + step * (i + 0.5) - window_sec / 2
+        out.append((round(start, 3), round(start + window_sec, 3)))
+    return out
+
+
+def _transcribe_sample(path, model_size, worker_socket):
+    worker_socket = worker_socket or os.getenv("TRANSCRIBE_WORKER_SOCKET")
+    if worker_socket:
+        from sales_call_analyzer.worker import transcribe_via_worker
+        res = transcribe_via_worker(path, worker_socket, model=model_size)
+        if res:
+            return res
+    return _try_faster_whisper(path, model_size=model_size)
+
+
+def preview_call(input_path, audio, model_size=None, worker_socket=None):
+    model_size = model_size or os.getenv("PREVIEW_MODEL", "base")
+    duration = len(audio) / 1000.0
+    windows = sample_windows(
+        duration,
+        head_sec=float(os.getenv("PREVIEW_HEAD_SEC", "120")),
+        window_sec=float(os.getenv("PREVIEW_WINDOW_SEC", "20")),
+        windows=int(os.getenv("PREVIEW_WINDOWS", "6")),
+    )
+    sampled = audio[0:0]
+    for start, end in windows:
+        sampled += audio[int(start * 1000):int(end * 1000)]
+    timeline = TimelineMap(windows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav_path = Path(tmp) / "preview.wav"
+        sampled.set_channels(1).set_frame_rate(SAMPLE_RATE).export(str(wav_path), format="wav")
+        res = _transcribe_sample(str(wav_path), model_size, worker_socket)
+    if not res:
+        return None
+    transcript_segments = timeline.remap_segments(res[0])
+    speaker_segments = timeline.remap_segments(diarize_audio(input_path, audio=sampled), split=True)
+    labeled_segments = align_transcript_to_speakers(transcript_segments, speaker_segments)
+    metrics = analyze_metrics(labeled_segments, input_path, speaker_segments=speaker_segments)
+    metrics["preview"] = {
+        "model": model_size,
+        "duration_sec": round(duration, 2),
+        "sampled_sec": round(timeline.kept, 2),
+        "windows": windows,
+    }
+    return metrics
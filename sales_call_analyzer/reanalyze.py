@@ -0,0 +1,128 @@
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from sales_call_analyzer.artifacts import ARTIFACT_DIR, MANIFEST, load_artifact, read_manifest, stage_versions, write_manifest
+
+_LOG = logging.getLogger("sales_call_analyzer.reanalyze")
+
+
+def find_calls(root):
+    return sorted(str(p.parent.parent) for p in Path(root).rglob(f"{ARTIFACT_DIR}/{MANIFEST}"))
+
+
+def _load_report(json_path):
+    if json_path.exists():
+        with open(json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    gz_path = Path(str(json_path) + ".gz")
+    if gz_path.exists():
+        with gzip.open(str(gz_path), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def _export(metrics, json_path):
+    export_dir = os.getenv("ANALYTICS_EXPORT_DIR")
+    if not export_dir:
+        return
+    try:
+        from sales_call_analyzer.export import env_options, export_call
+        export_call(metrics, export_dir, report_path=json_path, **env_options())
+    except Exception as exc:
+        _LOG.warning("analytics_export_failed call_dir=%s error=%s", json_path.parent, exc)
+
+
+def _flush_exports():
+    export_dir = os.getenv("ANALYTICS_EXPORT_DIR")
+    if not export_dir:
+        return
+    try:
+        from sales_call_analyzer.export import env_options, flush
+        flush(export_dir, fmt=env_options()["fmt"])
+    except Exception as exc:
+        _LOG.warning("analytics_flush_failed out=%s error=%s", export_dir, exc)
+
+
+def reanalyze_call(call_dir, force=False):
+    from sales_call_analyzer.analysis import analyze_metrics
+    from sales_call_analyzer.pdf_generator import generate_pdf
+
+    call_dir = Path(call_dir)
+    manifest = read_manifest(call_dir)
+    if not manifest:
+        return {"call_dir": str(call_dir), "status": "missing"}
+    stages = manifest["stages"]
+    current = stage_versions(manifest.get("backend", "faster"))
+    metrics_stale = force or stages.get("metrics") != current["metrics"]
+    pdf_stale = metrics_stale or stages.get("pdf") != current["pdf"]
+    if not pdf_stale:
+        return {"call_dir": str(call_dir), "status": "fresh"}
+    try:
+        json_path = call_dir / "report.json"
+        metrics = _load_report(json_path)
+        if metrics_stale:
+            labeled = load_artifact(call_dir, "labeled", stages.get("labeled"))
+            if labeled is None:
+                return {"call_dir": str(call_dir), "status": "missing"}
+            speaker_segments = load_artifact(call_dir, "speakers", stages.get("speakers"))
+            # Keep pipeline-level fields (duplicate_of, routing, trim, resources); replace only the analysis.
+            metrics = dict(metrics or {})
+            metrics.update(analyze_metrics(labeled, manifest["input_path"], speaker_segments=speaker_segments))
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump(metrics, f, ensure_ascii=False, indent=2)
+            _export(metrics, json_path)
+        elif metrics is None:
+            return {"call_dir": str(call_dir), "status": "missing"}
+        generate_pdf(metrics, call_dir / "report.pdf")
+        for name in ("report.json.gz", "report.pdf.gz"):
+            if (call_dir / name).exists() and (call_dir / name[:-3]).exists():
+                (call_dir / name).unlink()
+    except Exception as exc:
+        return {"call_dir": str(call_dir), "status": "error", "error": str(exc)}
+    stages["metrics"] = current["metrics"]
+    stages["pdf"] = current["pdf"]
+    write_manifest(call_dir, manifest["input_path"], stages, manifest.get("backend", "faster"))
+    return {"call_dir": str(call_dir), "status": "updated" if metrics_stale else "pdf_only"}
+
+
+def reanalyze_all(root, workers=None, force=False):
+    calls = find_calls(root)
+    summary = {"total": len(calls), "updated": 0, "pdf_only": 0, "fresh": 0, "missing": 0, "error": 0}
+    errors = []
+    if not calls:
+        return summary, errors
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, cpus, len(calls)))
+    # spawn: callers such as the web API are multi-threaded, where fork is unsafe.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for res in pool.map(reanalyze_call, calls, [force] * len(calls), chunksize=max(1, len(calls) // (workers * 8))):
+            summary[res["status"]] += 1
+            if res["status"] == "error":
+                errors.append(res)
+    if summary["updated"]:
+        _flush_exports()
+    return summary, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run stale analysis stages over stored calls")
+    parser.add_argument("roots", nargs="*", default=["outputs"], help="Output directories to scan")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes")
+    parser.add_argument("--force", action="store_true", help="Re-run analysis even if up to date")
+    args = parser.parse_args()
+
+    results = []
+    for root in args.roots:
+        summary, errors = reanalyze_all(root, workers=args.workers, force=args.force)
+        results.append({"root": root, "summary": summary, "errors": errors})
+    print(json.dumps({"results": results}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+import resource
+import time
+
+
+_DEDICATED = False
+
+
+class ResourceLimitError(RuntimeError):
+    pass
+
+
+def mark_dedicated_process():
+    """Declare that this process runs a single job, so process-wide counters are per-job."""
+    global _DEDICATED
+    _DEDICATED = True
+
+
+def _env_float(name, default=0.0):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def limits_from_env():
+    return {
+        "max_audio_sec": _env_float("JOB_MAX_AUDIO_SEC"),
+        "max_rss_mb": _env_float("JOB_MAX_RSS_MB"),
+        "max_wall_sec": _env_float("JOB_MAX_WALL_SEC"),
+    }
+
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def peak_rss_mb():
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024.0, 1)
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0), 1)
+
+
+def group_rss_mb(pgid):
+    page = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            total += int(fields[21]) * page
+    return round(total / (1024.0 * 1024.0), 1)
+
+
+def check_audio_duration(duration, limits=None):
+    limits = limits or limits_from_env()
+    max_sec = limits.get("max_audio_sec") or 0
+    if max_sec and duration > max_sec:
+        raise ResourceLimitError(
+            f"Audio is {duration / 60:.1f} min long; the limit is {max_sec / 60:.1f} min (JOB_MAX_AUDIO_SEC)."
+        )
+
+
+class ResourceMeter:
+    def __init__(self, progress=None):
+        self.progress = progress
+        self.audio_sec = None
+        self.stages = {}
+        self._stage = None
+        self._stage_start = None
+        self._start = time.monotonic()
+        self._cpu_start = cpu_seconds()
+        self._thread_cpu_start = time.thread_time()
+        self._rss_peak = current_rss_mb()
+
+    def __call__(self, stage, percent=None):
+        now = time.monotonic()
+        self._rss_peak = max(self._rss_peak, current_rss_mb())
+        if stage != self._stage:
+            self._close(now)
+            self._stage, self._stage_start = stage, now
+        if self.progress:
+            self.progress(stage, percent)
+
+    def _close(self, now):
+        if self._stage is not None:
+            self.stages[self._stage] = round(self.stages.get(self._stage, 0.0) + now - self._stage_start, 3)
+            self._stage_start = now
+
+    def summary(self):
+        """Per-job numbers when the job owns its process; otherwise process-wide values are labeled as such."""
+        self._close(time.monotonic())
+        out = {
+            "wall_sec": round(time.monotonic() - self._start, 3),
+            "audio_sec": round(self.audio_sec, 2) if self.audio_sec is not None else None,
+            "stage_wall_sec": dict(self.stages),
+        }
+        if _DEDICATED:
+            out.update({
+                "scope": "process",
+                "cpu_sec": round(cpu_seconds() - self._cpu_start, 3),
+                "peak_rss_mb": peak_rss_mb(),
+            })
+        else:
+            out.update({
+                "scope": "shared_process",
+                "thread_cpu_sec": round(time.thread_time() - self._thread_cpu_start, 3),
+                "process_cpu_sec": round(cpu_seconds() - self._cpu_start, 3),
+                "process_rss_peak_mb": max(self._rss_peak, current_rss_mb()),
+            })
+        return out
@@ -0,0 +1,176 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_PROFILES = {
+    "faster": {"rtf": 0.5, "overhead": 2.0, "slots": 2},
+    "openai": {"rtf": 0.1, "overhead": 3.0, "slots": 8},
+}
+
+_LOG = logging.getLogger("sales_call_analyzer.routing")
+
+
+class BackendRouter:
+    def __init__(self, backends, latency_target=None, hedge=None, hedge_ratio=0.8, alpha=0.3, profiles=None):
+        self.backends = backends
+        self.latency_target = latency_target if latency_target is not None else float(os.getenv("ROUTER_LATENCY_TARGET_SEC", "300"))
+        if hedge is None:
+            hedge = os.getenv("ROUTER_HEDGE", "1").lower() in ("1", "true", "yes")
+        self.hedge = hedge
+        self.hedge_ratio = hedge_ratio
+        self.alpha = alpha
+        profiles = profiles or DEFAULT_PROFILES
+        self.stats = {name: dict(profiles.get(name, {"rtf": 1.0, "overhead": 0.0, "slots": 1}), failure=0.0) for name in backends}
+        self.inflight = {name: 0 for name in backends}
+        self._lock = threading.Lock()
+
+    def available(self):
+        return [name for name, fn in self.backends.items() if getattr(fn, "available", lambda: True)()]
+
+    def predict(self, name, duration):
+        with self._lock:
+            st = self.stats[name]
+            queued = self.inflight[name] / float(max(1, st["slots"]))
+            expected = st["overhead"] + duration * st["rtf"] * (1.0 + queued)
+            return expected / max(0.05, 1.0 - st["failure"])
+
+    def decide(self, duration):
+        names = self.available()
+        if not names:
+            raise RuntimeError("Transcription unavailable. Install faster-whisper or set OPENAI_API_KEY.")
+        predicted = {name: round(self.predict(name, duration), 2) for name in names}
+        # Only backends with segment timestamps can be swapped for one another; the rest are last resorts.
+        timed = sorted((n for n in names if getattr(self.backends[n], "timestamps", True)), key=lambda n: predicted[n])
+        untimed = sorted((n for n in names if n not in timed), key=lambda n: predicted[n])
+        ranked = timed + untimed
+        peers = timed if timed else untimed
+        at_risk = predicted[ranked[0]] > self.hedge_ratio * self.latency_target
+        hedge_with = peers[1] if self.hedge and at_risk and len(peers) > 1 else None
+        return {
+            "duration_sec": round(duration, 2),
+            "target_sec": self.latency_target,
+            "predicted_sec": predicted,
+            "queue_depth": {n: self.inflight[n] for n in names},
+            "chosen": ranked[0],
+            "hedge_with": hedge_with,
+            "fallbacks": [n for n in ranked[1:] if n != hedge_with],
+        }
+
+    def observe(self, name, duration, elapsed, ok=True):
+        with self._lock:
+            st = self.stats[name]
+            st["failure"] = (1 - self.alpha) * st["failure"] + self.alpha * (0.0 if ok else 1.0)
+            if ok and duration > 0:
+                rtf = max(0.0, elapsed - st["overhead"]) / duration
+                st["rtf"] = (1 - self.alpha) * st["rtf"] + self.alpha * rtf
+
+    def _run(self, name, path, duration, cancel, on_progress, worker_socket=None):
+        with self._lock:
+            self.inflight[name] += 1
+        start = time.monotonic()
+        try:
+            res = self.backends[name](path, cancel=cancel, on_progress=on_progress, worker_socket=worker_socket)
+        except Exception:
+            if not cancel.is_set():
+                self.observe(name, duration, time.monotonic() - start, ok=False)
+            raise
+        finally:
+            with self._lock:
+                self.inflight[name] -= 1
+        elapsed = time.monotonic() - start
+        if not cancel.is_set():
+            self.observe(name, duration, elapsed, ok=bool(res))
+        return name, res, elapsed
+
+    def _race(self, names, path, duration, on_progress, worker_socket, errors):
+        cancels = {name: threading.Event() for name in names}
+        pool = ThreadPoolExecutor(max_workers=len(names))
+        futures = {
+            pool.submit(self._run, name, path, duration, cancels[name], on_progress if name == names[0] else None, worker_socket): name
+            for name in names
+        }
+        result = None
+        winner = None
+        pending = set(futures)
+        while pending and result is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    name, res, _ = fut.result()
+                except Exception as exc:
+                    errors[futures[fut]] = str(exc)
+                    continue
+                if res and result is None:
+                    result, winner = res, name
+                elif not res:
+                    errors[name] = "no result"
+        for name, ev in cancels.items():
+            if name != winner:
+                ev.set()
+        pool.shutdown(wait=False)
+        return result, winner
+
+    def transcribe(self, path, duration, on_progress=None, worker_socket=None):
+        decision = self.decide(duration)
+        names = [decision["chosen"]] + ([decision["hedge_with"]] if decision["hedge_with"] else [])
+        start = time.monotonic()
+        errors = {}
+        result, winner = self._race(names, path, duration, on_progress, worker_socket, errors)
+        for name in decision["fallbacks"]:
+            if result is not None:
+                break
+            _LOG.warning("routing_fallback backend=%s errors=%s", name, errors)
+            result, winner = self._race([name], path, duration, on_progress, worker_socket, errors)
+        elapsed = time.monotonic() - start
+        decision.update({
+            "winner": winner,
+            "cancelled": [n for n in names if n != winner and n not in errors],
+            "errors": errors,
+            "latency_sec": round(elapsed, 2),
+            "met_target": winner is not None and elapsed <= self.latency_target,
+        })
+        if result is None:
+            first_error = next(iter(errors.values()), None)
+            raise RuntimeError(f"Transcription unavailable. {first_error or ''}".strip())
+        return result, decision
+
+
+def _faster_backend(path, cancel=None, on_progress=None, worker_socket=None):
+    from sales_call_analyzer.transcribe import _try_faster_whisper
+    worker_socket = worker_socket or os.getenv("TRANSCRIBE_WORKER_SOCKET")
+    if worker_socket:
+        from sales_call_analyzer.worker import transcribe_via_worker
+        res = transcribe_via_worker(path, worker_socket, on_progress=on_progress, cancel=cancel)
+        if res or (cancel is not None and cancel.is_set()):
+            return res
+    return _try_faster_whisper(path, on_progress=on_progress, cancel=cancel)
+
+
+def _openai_backend(path, cancel=None, on_progress=None, worker_socket=None):
+    from sales_call_analyzer.transcribe import _try_openai_whisper
+    return _try_openai_whisper(path, raise_on_error=True)
+
+
+def _faster_available():
+    try:
+        import faster_whisper  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+_faster_backend.available = _faster_available
+_openai_backend.available = lambda: bool(os.getenv("OPENAI_API_KEY"))
+
+_ROUTER = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_router():
+    global _ROUTER
+    with _ROUTER_LOCK:
+        if _ROUTER is None:
+            _ROUTER = BackendRouter({"faster": _faster_backend, "openai": _openai_backend})
+        return _ROUTER
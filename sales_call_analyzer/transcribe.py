@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from threading import Lock
 
 from web_api.audio_utils import normalize_to_wav
 
@@ -15,17 +16,38 @@ class OpenAITranscriptionError(RuntimeError):
         message = error_message or "OpenAI transcription failed."
         super().__init__(f"OpenAI error {status_part} {code_part}: {message}")
 
-def _try_faster_whisper(path):
+_MODELS = {}
+_MODELS_LOCK = Lock()
+
+def get_whisper_model(size="medium", cpu_threads=0, num_workers=1):
+    from faster_whisper import WhisperModel
+    key = (size, cpu_threads, num_workers)
+    with _MODELS_LOCK:
+        model = _MODELS.get(key)
+        if model is None:
+            # num_workers > 1 lets CTranslate2 run that many transcribe() calls in parallel.
+            model = WhisperModel(size, device="cpu", compute_type="int8", cpu_threads=cpu_threads, num_workers=num_workers)
+            _MODELS[key] = model
+    return model
+
+def _try_faster_whisper(path, on_segment=None, cpu_threads=0, on_progress=None, cancel=None, model_size="medium", num_workers=1):
     try:
-        from faster_whisper import WhisperModel
+        import faster_whisper  # noqa: F401
     except Exception:
         return None
     try:
-        model = WhisperModel("medium", device="cpu", compute_type="int8")
+        model = get_whisper_model(model_size, cpu_threads=cpu_threads, num_workers=num_workers)
         segments, info = model.transcribe(path, vad_filter=True)
         out = []
         for seg in segments:
-            out.append({"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()})
+            if cancel is not None and cancel.is_set():
+                return None
+            item = {"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()}
+            out.append(item)
+            if on_segment:
+                on_segment(item)
+            if on_progress and info.duration:
+                on_progress(min(100.0, 100.0 * item["end"] / info.duration))
         return out, info.language
     except Exception:
         return None
@@ -43,9 +65,17 @@ def _try_openai_whisper(path, raise_on_error=False):
             normalize_to_wav(in_path, normalized)
             in_path = normalized
         with open(in_path, "rb") as f:
-            resp = client.audio.transcriptions.create(model="whisper-1", file=f)
-        text = resp.text.strip()
-        return [{"start": 0.0, "end": 0.0, "text": text}], None
+            resp = client.audio.transcriptions.create(
+                model="whisper-1", file=f, response_format="verbose_json", timestamp_granularities=["segment"]
+            )
+        segments = [
+            {"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()}
+            for seg in (resp.segments or [])
+            if seg.text.strip()
+        ]
+        if not segments:
+            segments = [{"start": 0.0, "end": float(resp.duration or 0.0), "text": resp.text.strip()}]
+        return segments, resp.language
     except Exception as exc:
         if not raise_on_error:
             return None
@@ -62,13 +92,24 @@ def _try_openai_whisper(path, raise_on_error=False):
             error_message=error_message,
         )
 
-def transcribe_audio(path, backend="faster"):
+def transcribe_audio(path, backend="faster", worker_socket=None, on_progress=None):
+    if backend == "auto":
+        from sales_call_analyzer.routing import get_router
+        from sales_call_analyzer.utils import audio_duration
+        res, _ = get_router().transcribe(path, audio_duration(path), on_progress=on_progress, worker_socket=worker_socket)
+        return res
+    worker_socket = worker_socket or os.getenv("TRANSCRIBE_WORKER_SOCKET")
+    if backend == "faster" and worker_socket:
+        from sales_call_analyzer.worker import transcribe_via_worker
+        res = transcribe_via_worker(path, worker_socket, on_progress=on_progress)
+        if res:
+            return res
     if backend == "openai":
         res = _try_openai_whisper(path, raise_on_error=True)
         if res:
             return res
     else:
-        res = _try_faster_whisper(path)
+        res = _try_faster_whisper(path, on_progress=on_progress)
         if res:
             return res
         res = _try_openai_whisper(path)
@@ -0,0 +1,140 @@
+import bisect
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME = 800
+CHUNK_FRAMES = 4096
+
+
+def load_pcm(path, sample_rate=SAMPLE_RATE):
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(path).set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16)
+
+
+def _rolling_mean(x, width):
+    c = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+    half = width // 2
+    idx = np.arange(len(x))
+    lo = np.clip(idx - half, 0, len(x))
+    hi = np.clip(idx + half + 1, 0, len(x))
+    return (c[hi] - c[lo]) / (hi - lo)
+
+
+def frame_features(pcm):
+    n = len(pcm) // FRAME
+    frames = pcm[:n * FRAME].reshape(n, FRAME)
+    energy = np.empty(n, dtype=np.float32)
+    flux = np.zeros(n, dtype=np.float32)
+    prev = None
+    window = np.hanning(FRAME).astype(np.float32)
+    for start in range(0, n, CHUNK_FRAMES):
+        chunk = frames[start:start + CHUNK_FRAMES].astype(np.float32) / 32768.0
+        energy[start:start + len(chunk)] = 10.0 * np.log10(np.mean(chunk * chunk, axis=1) + 1e-10)
+        mag = np.abs(np.fft.rfft(chunk * window, axis=1))
+        mag /= mag.sum(axis=1, keepdims=True) + 1e-10
+        diff = np.abs(np.diff(mag, axis=0)).sum(axis=1)
+        flux[start + 1:start + len(chunk)] = diff
+        if prev is not None:
+            flux[start] = np.abs(mag[0] - prev).sum()
+        prev = mag[-1]
+    return energy, flux
+
+
+def speech_intervals(pcm, sample_rate=SAMPLE_RATE, min_gap=2.0, pad=0.25, window_sec=1.0, music_energy_std=2.5, music_flux=0.3):
+    energy, flux = frame_features(pcm)
+    n = len(energy)
+    total = len(pcm) / float(sample_rate)
+    if n == 0:
+        return [(0.0, total)]
+    frame_sec = FRAME / float(sample_rate)
+    width = max(1, int(window_sec / frame_sec))
+    silence = energy < np.percentile(energy, 10) + 10.0
+    mean = _rolling_mean(energy, width)
+    std = np.sqrt(np.maximum(_rolling_mean(energy * energy, width) - mean * mean, 0.0))
+    music = (std < music_energy_std) & (_rolling_mean(flux, width) < music_flux) & ~silence
+    nonspeech = np.concatenate(([0], (silence | music).astype(np.int8), [0]))
+    edges = np.diff(nonspeech)
+    starts = np.flatnonzero(edges == 1) * frame_sec
+    ends = np.flatnonzero(edges == -1) * frame_sec
+    keep = []
+    cursor = 0.0
+    for s, e in zip(starts, ends):
+        if e - s < min_gap:
+            continue
+        cut_start = s + pad if s > 0 else 0.0
+        cut_end = e - pad if e < n * frame_sec else total
+        if cut_end - cut_start <= 0:
+            continue
+        if cut_start > cursor:
+            keep.append((cursor, cut_start))
+        cursor = cut_end
+    if cursor < total:
+        keep.append((cursor, total))
+    return [(round(float(a), 3), round(float(b), 3)) for a, b in keep if b - a > 0]
+
+
+class TimelineMap:
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.compact_starts = []
+        pos = 0.0
+        for start, end in intervals:
+            self.compact_starts.append(pos)
+            pos += end - start
+        self.kept = pos
+
+    def to_original(self, t, end=False):
+        if not self.intervals:
+            return t
+        find = bisect.bisect_left if end else bisect.bisect_right
+        i = max(0, find(self.compact_starts, t) - 1)
+        start, stop = self.intervals[i]
+        return round(min(stop, start + (t - self.compact_starts[i])), 3)
+
+    def remap_segments(self, segments, split=False):
+        """Map compacted segment times back to the original timeline.
+
+        An end time on an interval boundary stays in the interval it closes. With split, a segment
+        crossing a boundary becomes one piece per interval instead of covering the audio between.
+        """
+        out = []
+        for s in segments:
+            start, end = s.get("start", 0.0), s.get("end", 0.0)
+            bounds = [start, end]
+            if split:
+                cuts = self.compact_starts[bisect.bisect_right(self.compact_starts, start):bisect.bisect_left(self.compact_starts, end)]
+                bounds = [start] + cuts + [end]
+            for lo, hi in zip(bounds, bounds[1:]):
+                item = dict(s)
+                item["start"] = self.to_original(lo)
+                item["end"] = max(item["start"], self.to_original(hi, end=True))
+                out.append(item)
+        return out
+
+
+def write_compacted(pcm, intervals, out_path, sample_rate=SAMPLE_RATE):
+    with wave.open(str(out_path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        for start, end in intervals:
+            w.writeframes(pcm[int(start * sample_rate):int(end * sample_rate)].tobytes())
+    return out_path
+
+
+def trim_non_speech(path, out_path, **kwargs):
+    pcm = load_pcm(path)
+    intervals = speech_intervals(pcm, **kwargs)
+    write_compacted(pcm, intervals, out_path)
+    timeline = TimelineMap(intervals)
+    original = len(pcm) / float(SAMPLE_RATE)
+    stats = {
+        "original_sec": round(original, 2),
+        "kept_sec": round(timeline.kept, 2),
+        "removed_percent": round(100.0 * (1.0 - timeline.kept / original), 2) if original else 0.0,
+        "regions_kept": len(intervals),
+    }
+    return timeline, stats
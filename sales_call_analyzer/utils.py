@@ -1,6 +1,7 @@
 import re
-import unicodedata
 import time
+from threading import Lock
+from sales_call_analyzer.keywords import QUESTION_PATTERNS
 
 def timestamp_id():
     return str(int(time.time()))
@@ -8,44 +9,104 @@ def timestamp_id():
 def safe_filename(name):
     return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
 
+_TOKEN_RE = re.compile(
+    r"(?P<num>\d+(?:,\d+)*(?:\.\d+)?)(?:\s*(?P<unit>lakhs?|lacs?|crores?|cr|k|m|million|लाख|करोड़)(?![\w\u0900-\u097F]))?(?P<plus>\+)?"
+    r"|(?P<word>[\w\u0900-\u097F]+)"
+    r"|(?P<q>[?？])",
+    flags=re.IGNORECASE,
+)
+_DEVANAGARI_RE = re.compile(r"[\u0900-\u097F\uA8E0-\uA8FF]")
+_QUESTION_WORDS = frozenset(p.lower() for p in QUESTION_PATTERNS if p.isalnum())
+_UNIT_MULTIPLIERS = {
+    "k": 1e3,
+    "m": 1e6,
+    "million": 1e6,
+    "lakh": 1e5,
+    "lakhs": 1e5,
+    "lac": 1e5,
+    "lacs": 1e5,
+    "लाख": 1e5,
+    "crore": 1e7,
+    "crores": 1e7,
+    "cr": 1e7,
+    "करोड़": 1e7,
+}
+
 def is_devanagari(ch):
-    return "devanagari" in unicodedata.name(ch, "").lower()
+    return _DEVANAGARI_RE.match(ch) is not None
 
-def language_split(text):
-    words = re.findall(r"\w+", text, flags=re.UNICODE)
+def _numeric_value(digits, unit):
+    value = float(digits.replace(",", ""))
+    if unit:
+        value *= _UNIT_MULTIPLIERS.get(unit.lower(), 1.0)
+    return int(value) if value.is_integer() else value
+
+def analyze_text(text):
+    words = 0
     hi = 0
-    en = 0
-    for w in words:
-        if any(is_devanagari(c) for c in w):
-            hi += 1
-        else:
-            en += 1
+    question = False
+    numbers = []
+    for m in _TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "word":
+            w = m.group("word")
+            words += 1
+            if _DEVANAGARI_RE.search(w):
+                hi += 1
+            elif not question and w.lower() in _QUESTION_WORDS:
+                question = True
+        elif m.group("num") is not None:
+            words += 1
+            start = max(0, m.start() - 60)
+            end = min(len(text), m.end() + 60)
+            numbers.append({
+                "value": m.group(0).strip(),
+                "numeric_value": _numeric_value(m.group("num"), m.group("unit")),
+                "context": text[start:end].strip(),
+            })
+        elif kind == "q":
+            question = True
+    return {"words": words, "hindi_words": hi, "english_words": words - hi, "is_question": question, "numbers": numbers}
+
+def language_percentages(hi, en):
     total = hi + en
     if total == 0:
         return {"hindi_percent": 0.0, "english_percent": 0.0}
     return {"hindi_percent": round(100.0 * hi / total, 2), "english_percent": round(100.0 * en / total, 2)}
 
+def language_split(text):
+    res = analyze_text(text)
+    return language_percentages(res["hindi_words"], res["english_words"])
+
 def is_question(text):
-    from sales_call_analyzer.keywords import QUESTION_PATTERNS
-    t = text.lower()
-    return any(p in t for p in QUESTION_PATTERNS)
+    return analyze_text(text)["is_question"]
 
 def extract_numbers_with_context(text):
-    res = []
-    for m in re.finditer(r"\b(\d+[\d,]*\+?|\d+\s*(m|lakh|crore)\+?)\b", text, flags=re.IGNORECASE):
-        start = max(0, m.start() - 60)
-        end = min(len(text), m.end() + 60)
-        ctx = text[start:end].strip()
-        res.append({"value": m.group(0), "context": ctx})
-    return res
+    return analyze_text(text)["numbers"]
+
+def audio_duration(path):
+    from pydub.utils import mediainfo
+    try:
+        return float(mediainfo(str(path)).get("duration") or 0.0)
+    except (OSError, ValueError):
+        return 0.0
+
+_SENTIMENT_MODEL = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+_SENTIMENT = {}
+_SENTIMENT_LOCK = Lock()
+
+def _sentiment_model():
+    with _SENTIMENT_LOCK:
+        if not _SENTIMENT:
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+            _SENTIMENT["tok"] = AutoTokenizer.from_pretrained(_SENTIMENT_MODEL)
+            _SENTIMENT["mdl"] = AutoModelForSequenceClassification.from_pretrained(_SENTIMENT_MODEL)
+    return _SENTIMENT["tok"], _SENTIMENT["mdl"]
 
 def sentiment_score(text):
     try:
-        from transformers import AutoTokenizer, AutoModelForSequenceClassification
         import torch
-        name = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
-        tok = AutoTokenizer.from_pretrained(name)
-        mdl = AutoModelForSequenceClassification.from_pretrained(name)
+        tok, mdl = _sentiment_model()
         inputs = tok(text[:2000], return_tensors="pt", truncation=True)
         with torch.no_grad():
             logits = mdl(**inputs).logits
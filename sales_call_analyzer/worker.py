@@ -0,0 +1,159 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+from threading import BoundedSemaphore
+
+from sales_call_analyzer.transcribe import _try_faster_whisper, get_whisper_model
+
+DEFAULT_SOCKET = "/tmp/sales_call_analyzer_transcribe.sock"
+HEARTBEAT_SEC = 10.0
+_LOG = logging.getLogger("transcribe_worker")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            req = json.loads(line.decode("utf-8"))
+            path = req["path"]
+            model_size = req.get("model") or "medium"
+        except Exception:
+            self._send({"error": "Invalid request."})
+            return
+        if not os.path.exists(path):
+            self._send({"error": f"Audio file not found: {path}"})
+            return
+        server = self.server
+        # Queued requests get heartbeats so the client's idle timeout only covers a stalled job.
+        while not server.slots.acquire(timeout=HEARTBEAT_SEC):
+            try:
+                self._send({"queued": True})
+            except OSError:
+                return
+        try:
+            _LOG.info("worker_job_start path=%s model=%s", path, model_size)
+            res = _try_faster_whisper(
+                path,
+                on_segment=lambda seg: self._send({"segment": seg}),
+                cpu_threads=server.threads_per_job,
+                num_workers=server.jobs,
+                on_progress=lambda pct: self._send({"progress": round(pct, 1)}),
+                model_size=model_size,
+            )
+        finally:
+            server.slots.release()
+        if res is None:
+            try:
+                self._send({"error": "Transcription unavailable in worker."})
+            except OSError:
+                _LOG.info("worker_job_cancelled path=%s", path)
+            return
+        _LOG.info("worker_job_done path=%s segments=%d", path, len(res[0]))
+        self._send({"done": True, "language": res[1]})
+
+    def _send(self, obj):
+        self.wfile.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class TranscriptionWorker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, cores=None, jobs=1):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        cores = cores or os.cpu_count() or 1
+        self.jobs = max(1, min(jobs, cores))
+        self.slots = BoundedSemaphore(self.jobs)
+        self.threads_per_job = max(1, cores // self.jobs)
+        super().__init__(socket_path, _Handler)
+
+
+def _read_lines(sock, cancel=None, timeout=None, poll=1.0):
+    """Yield response lines; stops early once cancel is set and raises socket.timeout after timeout idle seconds."""
+    sock.settimeout(poll if cancel is not None else timeout)
+    buf = b""
+    idle = 0.0
+    while cancel is None or not cancel.is_set():
+        try:
+            chunk = sock.recv(65536)
+        except socket.timeout:
+            idle += poll
+            if cancel is None or (timeout and idle >= timeout):
+                raise
+            continue
+        if not chunk:
+            return
+        idle = 0.0
+        *lines, buf = (buf + chunk).split(b"\n")
+        yield from lines
+
+
+def transcribe_via_worker(path, socket_path, timeout=None, on_progress=None, model=None, cancel=None):
+    """Transcribe through the worker; None means transcribe in-process instead.
+
+    timeout (TRANSCRIBE_WORKER_TIMEOUT_SEC, default 600) is how long the worker may stay silent;
+    setting cancel closes the connection, which stops the job in the worker.
+    """
+    timeout = timeout or float(os.getenv("TRANSCRIBE_WORKER_TIMEOUT_SEC", "600"))
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+    except OSError as exc:
+        _LOG.warning("worker_unavailable socket=%s error=%s; transcribing in-process", socket_path, exc)
+        return None
+    out = []
+    with sock:
+        req = {"path": os.path.abspath(path)}
+        if model:
+            req["model"] = model
+        try:
+            sock.sendall((json.dumps(req) + "\n").encode("utf-8"))
+            for line in _read_lines(sock, cancel, timeout):
+                msg = json.loads(line.decode("utf-8"))
+                if "segment" in msg:
+                    out.append(msg["segment"])
+                elif "progress" in msg:
+                    if on_progress:
+                        on_progress(msg["progress"])
+                elif "error" in msg:
+                    _LOG.warning("worker_error socket=%s path=%s error=%s; transcribing in-process", socket_path, path, msg["error"])
+                    return None
+                elif msg.get("done"):
+                    return out, msg.get("language")
+        except (OSError, ValueError) as exc:
+            _LOG.warning("worker_unavailable socket=%s path=%s error=%r; transcribing in-process", socket_path, path, exc)
+            return None
+    if cancel is not None and cancel.is_set():
+        return None
+    _LOG.warning("worker_disconnected socket=%s path=%s; transcribing in-process", socket_path, path)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local transcription worker")
+    parser.add_argument("--socket", default=os.getenv("TRANSCRIBE_WORKER_SOCKET", DEFAULT_SOCKET), help="Unix socket path")
+    parser.add_argument("--cores", type=int, default=None, help="Total CPU threads the worker may use")
+    parser.add_argument("--jobs", type=int, default=1, help="Concurrent transcription jobs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    server = TranscriptionWorker(args.socket, cores=args.cores, jobs=args.jobs)
+    get_whisper_model("medium", cpu_threads=server.threads_per_job, num_workers=server.jobs)
+    _LOG.info("worker_ready socket=%s jobs=%d threads_per_job=%d", args.socket, server.jobs, server.threads_per_job)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import wave
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def _print(msg):
+    sys.stdout.write(msg + "\n")
+    sys.stdout.flush()
+
+
+def _rss_bytes(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _silent_wav(seconds=1.0, rate=16000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buf.getvalue()
+
+
+def make_stub_process_call(latency, jitter):
+    def stub_process_call(input_path, out_root, backend="faster", **kwargs):
+        time.sleep(max(0.0, random.gauss(latency, jitter)))
+        call_dir = os.path.join(out_root, "stub")
+        os.makedirs(call_dir, exist_ok=True)
+        metrics = {"call_id": "stub", "file_name": os.path.basename(input_path), "segments": []}
+        json_path = os.path.join(call_dir, "report.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(metrics, f)
+        pdf_path = os.path.join(call_dir, "report.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4\n%stub\n")
+        metrics["output_json_path"] = json_path
+        metrics["output_pdf_path"] = pdf_path
+        return metrics, pdf_path
+
+    return stub_process_call
+
+
+def _serve_stub(port, latency, jitter, workdir):
+    import uvicorn
+    import web_api.main as api
+
+    os.chdir(workdir)
+    api.process_call = make_stub_process_call(latency, jitter)
+    api._PIPELINE_IMPORT_ERROR = None
+    api.diagnostics.check_faster_whisper_import = lambda: None
+    api.diagnostics.check_openai_import = lambda: None
+    uvicorn.run(api.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_stub_server(latency, jitter):
+    """Run the API with a stub pipeline in a child process, so its memory is measured apart from the load generator."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    proc = multiprocessing.get_context("spawn").Process(target=_serve_stub, args=(port, latency, jitter, workdir), daemon=True)
+    proc.start()
+    deadline = time.time() + 30
+    while time.time() < deadline and proc.is_alive():
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return proc, f"http://127.0.0.1:{port}", workdir
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    shutil.rmtree(workdir, ignore_errors=True)
+    raise RuntimeError("Stub server failed to start.")
+
+
+async def _request(host, port, method, path, body=b"", headers=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close", f"Content-Length: {len(body)}"]
+        for k, v in (headers or {}).items():
+            lines.append(f"{k}: {v}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        status = int(status_line.split()[1])
+        resp_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            resp_headers[k.strip().lower()] = v.strip()
+        if resp_headers.get("transfer-encoding") == "chunked":
+            data = bytearray()
+            while True:
+                size = int((await reader.readline()).strip() or b"0", 16)
+                if size == 0:
+                    break
+                data += await reader.readexactly(size)
+                await reader.readline()
+            payload = bytes(data)
+        elif "content-length" in resp_headers:
+            payload = await reader.readexactly(int(resp_headers["content-length"]))
+        else:
+            payload = await reader.read()
+        return status, payload
+    finally:
+        writer.close()
+
+
+def _multipart(fields, filename, data, content_type="audio/wav"):
+    boundary = "----loadtest" + str(random.getrandbits(48))
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8"))
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + data + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class LoadRun:
+    def __init__(self, base_url, users, backend, upload_bytes):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.sem = asyncio.Semaphore(users)
+        self.backend = backend
+        self.upload_bytes = upload_bytes
+        self.jobs = []
+        self.done_jobs = []
+        self.stats = {op: {"latencies": [], "errors": 0} for op in ("upload", "poll", "download")}
+
+    async def _timed(self, op, coro):
+        async with self.sem:
+            start = time.perf_counter()
+            try:
+                status, payload = await coro
+                ok = 200 <= status < 300
+            except Exception:
+                status, payload, ok = None, b"", False
+            self.stats[op]["latencies"].append(time.perf_counter() - start)
+            if not ok:
+                self.stats[op]["errors"] += 1
+            return status, payload
+
+    async def upload(self):
+        body, ctype = _multipart({"backend": self.backend}, "load.wav", self.upload_bytes)
+        status, payload = await self._timed("upload", _request(self.host, self.port, "POST", "/analyze", body, {"Content-Type": ctype}))
+        if status == 200:
+            self.jobs.append(json.loads(payload)["job_id"])
+
+    async def poll(self):
+        if not self.jobs:
+            return
+        job_id = random.choice(self.jobs)
+        status, payload = await self._timed("poll", _request(self.host, self.port, "GET", f"/jobs/{job_id}"))
+        if status == 200 and json.loads(payload).get("status") == "done" and job_id not in self.done_jobs:
+            self.done_jobs.append(job_id)
+
+    async def download(self):
+        if not self.done_jobs:
+            return
+        job_id = random.choice(self.done_jobs)
+        name = random.choice(("report.pdf", "report.json"))
+        await self._timed("download", _request(self.host, self.port, "GET", f"/download/{job_id}/{name}"))
+
+    async def _drive(self, op, rate, deadline, tasks):
+        if rate <= 0:
+            return
+        interval = 1.0 / rate
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            tasks.append(asyncio.ensure_future(getattr(self, op)()))
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+    async def run(self, duration, rates):
+        deadline = time.perf_counter() + duration
+        tasks = []
+        await asyncio.gather(*(self._drive(op, rate, deadline, tasks) for op, rate in rates.items()))
+        await asyncio.gather(*tasks)
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(run, duration, rss_before, rss_after):
+    ops = {}
+    for op, st in run.stats.items():
+        lat = st["latencies"]
+        n = len(lat)
+        ops[op] = {
+            "requests": n,
+            "throughput_rps": round(n / duration, 2),
+            "error_rate": round(st["errors"] / n, 4) if n else 0.0,
+            "p50_ms": round(1000 * _percentile(lat, 50), 2),
+            "p90_ms": round(1000 * _percentile(lat, 90), 2),
+            "p99_ms": round(1000 * _percentile(lat, 99), 2),
+            "max_ms": round(1000 * max(lat), 2) if lat else 0.0,
+        }
+    growth = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    return {
+        "duration_sec": duration,
+        "ops": ops,
+        "jobs_created": len(run.jobs),
+        "jobs_done": len(run.done_jobs),
+        "server_rss_bytes": {"before": rss_before, "after": rss_after, "growth": growth},
+    }
+
+
+def compare(report, baseline):
+    lines = []
+    for op, cur in report["ops"].items():
+        base = baseline.get("ops", {}).get(op)
+        if not base:
+            continue
+        for key in ("throughput_rps", "error_rate", "p50_ms", "p99_ms"):
+            b = base.get(key, 0.0)
+            c = cur.get(key, 0.0)
+            delta = f"{100.0 * (c - b) / b:+.1f}%" if b else "n/a"
+            lines.append(f"- {op}.{key}: {b} -> {c} ({delta})")
+    b_growth = baseline.get("server_rss_bytes", {}).get("growth")
+    c_growth = report["server_rss_bytes"]["growth"]
+    if b_growth is not None and c_growth is not None:
+        lines.append(f"- server_rss_growth_bytes: {b_growth} -> {c_growth}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Sales Call Analyzer API")
+    parser.add_argument("--base-url", default=None, help="Target a running server instead of a local stub server")
+    parser.add_argument("--server-pid", default=None, help="PID of the target server, for memory growth")
+    parser.add_argument("--backend", default="faster", choices=["faster", "openai", "auto"])
+    parser.add_argument("--users", type=int, default=200, help="Maximum concurrent requests")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic")
+    parser.add_argument("--upload-rate", type=float, default=5.0, help="Uploads per second")
+    parser.add_argument("--poll-rate", type=float, default=100.0, help="Job polls per second")
+    parser.add_argument("--download-rate", type=float, default=20.0, help="Downloads per second")
+    parser.add_argument("--stub-latency", type=float, default=2.0, help="Mean stub process_call latency (stub server)")
+    parser.add_argument("--stub-jitter", type=float, default=0.5, help="Stub latency standard deviation (stub server)")
+    parser.add_argument("--upload-seconds", type=float, default=5.0, help="Length of the synthetic upload")
+    parser.add_argument("--save-baseline", default=None, help="Write the report JSON to this path")
+    parser.add_argument("--compare", default=None, help="Compare against a saved baseline JSON")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    pid = args.server_pid
+    if not base_url:
+        server, base_url, workdir = start_stub_server(args.stub_latency, args.stub_jitter)
+        pid = server.pid
+    _print(f"target: {base_url}")
+
+    rss_before = _rss_bytes(pid) if pid else None
+    run = LoadRun(base_url, args.users, args.backend, _silent_wav(args.upload_seconds))
+    rates = {"upload": args.upload_rate, "poll": args.poll_rate, "download": args.download_rate}
+    asyncio.run(run.run(args.duration, rates))
+    rss_after = _rss_bytes(pid) if pid else None
+    if server:
+        server.terminate()
+        server.join()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = summarize(run, args.duration, rss_before, rss_after)
+    _print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        _print("compare:")
+        for line in compare(report, baseline):
+            _print(line)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        _print(f"baseline saved: {args.save_baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
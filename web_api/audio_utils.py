@@ -32,3 +32,33 @@ def normalize_to_wav(input_path: Path, output_path: Path) -> Path:
         raise RuntimeError("Audio conversion failed: output file missing or empty.")
 
     return output_path
+
+
+def transcode_to_opus(input_path: Path, output_path: Path, bitrate: str = "16k") -> Path:
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("Audio conversion failed: ffmpeg not found. Install ffmpeg (brew install ffmpeg).")
+
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        str(input_path),
+        "-ac",
+        "1",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        bitrate,
+        "-application",
+        "voip",
+        str(output_path),
+    ]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as exc:
+        raise RuntimeError("Audio conversion failed: ffmpeg error.") from exc
+
+    if not output_path.exists() or output_path.stat().st_size <= 0:
+        raise RuntimeError("Audio conversion failed: output file missing or empty.")
+
+    return output_path
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import tarfile
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_CHUNK = 64 * 1024
+_BLOCK = tarfile.BLOCKSIZE
+_STORED_SUFFIXES = (".pdf", ".gz")
+
+Entry = Tuple[str, str]
+
+
+def parse_bound(value: Optional[str], end: bool = False) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def select_jobs(
+    jobs: Iterable[dict],
+    status: Optional[str] = "done",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    filename: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[dict]:
+    """Filtered jobs in (created_at, job_id) order, strictly after the `after` job's key; KeyError if it is unknown."""
+    jobs = list(jobs)
+    cursor = None
+    if after:
+        cursor = next(((j["created_at"], j["job_id"]) for j in jobs if j["job_id"] == after), None)
+        if cursor is None:
+            raise KeyError(after)
+    selected = []
+    for job in jobs:
+        if job.get("kind") == "reanalyze":
+            continue
+        if status and job.get("status") != status:
+            continue
+        created = datetime.fromisoformat(job["created_at"])
+        if (since and created < since) or (until and created >= until):
+            continue
+        if filename and not fnmatch.fnmatch((job.get("filename") or "").lower(), filename.lower()):
+            continue
+        selected.append(job)
+    selected.sort(key=lambda j: (j["created_at"], j["job_id"]))
+    if cursor:
+        selected = [j for j in selected if (j["created_at"], j["job_id"]) > cursor]
+    return selected
+
+
+def _copy(path: str, start: int = 0, length: Optional[int] = None) -> Iterator[bytes]:
+    remaining = length
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining is None or remaining > 0:
+            chunk = f.read(_CHUNK if remaining is None else min(_CHUNK, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    if remaining:
+        yield b"\0" * remaining
+
+
+class TarStream:
+    """Uncompressed tar laid out from file sizes up front, so any byte range can be served by seeking."""
+
+    def __init__(self, entries: List[Entry]) -> None:
+        self.parts: List[Tuple[int, int, object]] = []
+        offset = 0
+        fingerprint = hashlib.sha256()
+        for arcname, path in entries:
+            st = os.stat(path)
+            info = tarfile.TarInfo(arcname)
+            info.size = st.st_size
+            info.mtime = int(st.st_mtime)
+            info.mode = 0o644
+            header = info.tobuf(format=tarfile.PAX_FORMAT)
+            padded = -st.st_size % _BLOCK
+            for size, src in ((len(header), header), (st.st_size, path), (padded, None)):
+                if size:
+                    self.parts.append((offset, size, src))
+                    offset += size
+            fingerprint.update(f"{arcname}:{st.st_size}:{st.st_mtime_ns}\n".encode("utf-8"))
+        self.parts.append((offset, 2 * _BLOCK, None))
+        self.length = offset + 2 * _BLOCK
+        self.etag = f'"{fingerprint.hexdigest()[:32]}"'
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        end = self.length - 1 if end is None else end
+        for offset, size, src in self.parts:
+            lo, hi = max(start, offset), min(end + 1, offset + size)
+            if lo >= hi:
+                continue
+            if src is None:
+                yield b"\0" * (hi - lo)
+            elif isinstance(src, bytes):
+                yield src[lo - offset:hi - offset]
+            else:
+                yield from _copy(src, lo - offset, hi - lo)
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self.chunks = self.chunks, []
+        yield from chunks
+
+
+def zip_stream(entries: List[Entry]) -> Iterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w") as zf:
+        for arcname, path in entries:
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            if not path.endswith(_STORED_SUFFIXES):
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, "w", force_zip64=True) as dest:
+                for chunk in _copy(path):
+                    dest.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+
+def jsonl_stream(reports: List[Tuple[dict, str]]) -> Iterator[bytes]:
+    for job, path in reports:
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError) as exc:
+            report = {"error": f"report unreadable: {exc}"}
+        line: Dict[str, object] = {"job_id": job["job_id"], "filename": job.get("filename"), "created_at": job["created_at"]}
+        line.update(report)
+        yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range; raises ValueError when it cannot be satisfied."""
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(header)
+    first, _, last = spec.strip().partition("-")
+    if first:
+        start = int(first)
+        end = min(int(last), length - 1) if last else length - 1
+    else:
+        start, end = max(0, length - int(last)), length - 1
+    if start > end or start >= length:
+        raise ValueError(header)
+    return start, end
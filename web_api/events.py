@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import asyncio
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+
+class JobEvents:
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subs = self._subscribers.get(job_id, [])
+            self._subscribers[job_id] = [s for s in subs if s[1] is not queue]
+            if not self._subscribers[job_id]:
+                del self._subscribers[job_id]
+
+    def publish(self, job_id: str, snapshot: dict) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(job_id, []))
+        for loop, queue in subs:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+            except RuntimeError:
+                self.unsubscribe(job_id, queue)
+
+    async def next(self, queue: asyncio.Queue, timeout: float) -> Optional[dict]:
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
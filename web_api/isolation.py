@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sales_call_analyzer.resources import ResourceLimitError, group_rss_mb, limits_from_env, mark_dedicated_process
+
+_CTX = multiprocessing.get_context("spawn")
+
+
+class IsolatedJobError(RuntimeError):
+    def __init__(self, message: str, openai_error: Optional[dict] = None) -> None:
+        super().__init__(message)
+        self.openai_error = openai_error
+
+
+def _relay(messages, name: str) -> Callable:
+    return lambda *args: messages.put(("call", name, args))
+
+
+def _child(messages, fn: Callable, kwargs: Dict[str, Any], relays: Tuple[str, ...]) -> None:
+    os.setsid()
+    mark_dedicated_process()
+    try:
+        result = fn(**kwargs, **{name: _relay(messages, name) for name in relays})
+        messages.put(("done", result))
+    except Exception as exc:
+        openai_error = None
+        if hasattr(exc, "class_name"):
+            openai_error = {
+                "class_name": exc.class_name,
+                "status_code": getattr(exc, "status_code", None),
+                "code": getattr(exc, "error_code", None),
+                "message": getattr(exc, "error_message", None),
+            }
+        messages.put(("error", str(exc), openai_error))
+
+
+def _kill(proc) -> None:
+    if proc.is_alive():
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            proc.kill()
+    proc.join()
+
+
+def _exit_reason(exitcode: Optional[int]) -> str:
+    if exitcode is not None and exitcode < 0:
+        name = signal.Signals(-exitcode).name
+        hint = " (likely out of memory)" if -exitcode == signal.SIGKILL else ""
+        return f"Job worker was killed by {name}{hint}."
+    return f"Job worker exited unexpectedly (exit code {exitcode})."
+
+
+def isolation_enabled(limits: Optional[Dict[str, float]] = None) -> bool:
+    limits = limits or limits_from_env()
+    if os.getenv("JOB_ISOLATION", "").lower() in ("1", "true", "yes"):
+        return True
+    return bool(limits.get("max_rss_mb") or limits.get("max_wall_sec"))
+
+
+def run_isolated(
+    fn: Callable,
+    kwargs: Dict[str, Any],
+    limits: Optional[Dict[str, float]] = None,
+    callbacks: Optional[Dict[str, Callable]] = None,
+    poll_interval: float = 0.5,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Run fn(**kwargs) in its own process group under wall-time and RSS limits.
+
+    Each entry in callbacks is passed to fn as a keyword argument that relays its calls back to
+    this process; calls to `progress(stage, percent)` also track the current stage.
+    """
+    callbacks = callbacks or {}
+    limits = limits or limits_from_env()
+    max_rss = limits.get("max_rss_mb") or 0
+    max_wall = limits.get("max_wall_sec") or 0
+    messages = _CTX.Queue()
+    proc = _CTX.Process(target=_child, args=(messages, fn, kwargs, tuple(callbacks)))
+    stats = {"isolated": True, "wall_sec": 0.0, "peak_group_rss_mb": 0.0, "stage": None}
+    start = time.monotonic()
+    proc.start()
+    try:
+        while True:
+            try:
+                msg = messages.get(timeout=poll_interval if proc.is_alive() else 1.0)
+            except queue.Empty:
+                msg = None
+                if not proc.is_alive():
+                    raise IsolatedJobError(_exit_reason(proc.exitcode))
+            stats["wall_sec"] = round(time.monotonic() - start, 3)
+            if msg and msg[0] == "done":
+                return msg[1], stats
+            if msg and msg[0] == "error":
+                raise IsolatedJobError(msg[1], msg[2])
+            if msg and msg[0] == "call":
+                name, args = msg[1], msg[2]
+                if name == "progress":
+                    stats["stage"] = args[0]
+                callbacks[name](*args)
+            rss = group_rss_mb(proc.pid)
+            stats["peak_group_rss_mb"] = max(stats["peak_group_rss_mb"], rss)
+            if max_rss and rss > max_rss:
+                raise ResourceLimitError(
+                    f"Job used {rss:.0f} MB during '{stats['stage']}'; the limit is {max_rss:.0f} MB (JOB_MAX_RSS_MB)."
+                )
+            if max_wall and stats["wall_sec"] > max_wall:
+                raise ResourceLimitError(
+                    f"Job ran for {stats['wall_sec']:.0f}s and was stopped during '{stats['stage']}'; "
+                    f"the limit is {max_wall:.0f}s (JOB_MAX_WALL_SEC)."
+                )
+    except (IsolatedJobError, ResourceLimitError) as exc:
+        exc.resources = stats
+        raise
+    finally:
+        _kill(proc)
+        messages.close()
@@ -1,16 +1,21 @@
 from datetime import datetime, timezone
+import json
 import logging
 import os
 from pathlib import Path
 from threading import Lock
+from typing import Optional
 from uuid import uuid4
 from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, Form, Header, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from web_api import diagnostics
+from web_api import bulk_export, diagnostics
+from web_api.events import JobEvents
+from web_api.isolation import isolation_enabled, run_isolated
+from web_api.retention import RetentionManager, clear_running, mark_running
 
 diagnostics.load_env()
 
@@ -23,6 +28,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Content-Disposition", "Content-Range"],
 )
 
 process_call, _PIPELINE_IMPORT_ERROR = diagnostics.import_pipeline()
@@ -32,10 +38,17 @@ except Exception:
     OpenAITranscriptionError = None
 
 _ALLOWED_EXTENSIONS = {".mp3", ".wav", ".m4a", ".aac"}
-_ALLOWED_BACKENDS = {"faster", "openai"}
+_ALLOWED_BACKENDS = {"faster", "openai", "auto"}
+_UPLOAD_ROOT = "uploads"
+_OUTPUT_ROOT = os.path.join("outputs", "web")
 _JOB_STORE = {}
 _JOB_LOCK = Lock()
+_EVENTS = JobEvents()
+_TERMINAL_STATUSES = {"done", "error", "expired"}
+_MAX_WAIT_SEC = 60.0
+_SSE_KEEPALIVE_SEC = 15.0
 _EXECUTOR = ThreadPoolExecutor(max_workers=2)
+_REANALYZE_EXECUTOR = ThreadPoolExecutor(max_workers=1)
 _LOG = logging.getLogger("web_api")
 logging.basicConfig(level=logging.INFO)
 
@@ -63,17 +76,99 @@ def _set_job(job_id, **updates):
             return
         job.update(updates)
         job["updated_at"] = _now_iso()
+        job["version"] = job.get("version", 0) + 1
+        snapshot = dict(job)
+    _EVENTS.publish(job_id, snapshot)
 
 
-def _run_analysis(job_id, upload_path, backend, filename):
+def _get_job(job_id):
+    with _JOB_LOCK:
+        job = _JOB_STORE.get(job_id)
+        return dict(job) if job else None
+
+
+def _job_etag(job):
+    return f'"{job["job_id"]}-{job.get("version", 0)}"'
+
+
+def _jobs_snapshot():
+    with _JOB_LOCK:
+        return {job_id: dict(job) for job_id, job in _JOB_STORE.items()}
+
+
+_RETENTION = RetentionManager(_UPLOAD_ROOT, _OUTPUT_ROOT, _jobs_snapshot, _set_job)
+
+
+_EXPORT_FLUSHER = None
+
+
+@app.on_event("startup")
+def _start_retention():
+    if os.getenv("RETENTION_ENABLED", "").lower() in ("1", "true", "yes"):
+        _RETENTION.start()
+
+
+@app.on_event("startup")
+def _start_export_flusher():
+    global _EXPORT_FLUSHER
+    export_dir = os.getenv("ANALYTICS_EXPORT_DIR")
+    if export_dir:
+        from sales_call_analyzer.export import ExportFlusher, env_options
+        options = env_options()
+        _EXPORT_FLUSHER = ExportFlusher(export_dir, fmt=options["fmt"], max_age_sec=options["max_age_sec"])
+        _EXPORT_FLUSHER.start()
+
+
+@app.on_event("shutdown")
+def _stop_retention():
+    _RETENTION.stop()
+
+
+@app.on_event("shutdown")
+def _stop_export_flusher():
+    if _EXPORT_FLUSHER is not None:
+        _EXPORT_FLUSHER.stop()
+
+
+def _resolve_report(path):
+    if not path:
+        return None
+    for candidate in (path, path[:-3] if path.endswith(".gz") else path + ".gz"):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _report_response(path, media_type, filename):
+    if path.endswith(".gz"):
+        return FileResponse(path, media_type=media_type, filename=filename, headers={"Content-Encoding": "gzip"})
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+
+def _preview_summary(metrics):
+    return {k: v for k, v in metrics.items() if k != "segments"}
+
+
+def _run_analysis(job_id, upload_path, backend, filename, preview=False):
     _set_job(job_id, status="running")
     _LOG.info("job_start job_id=%s backend=%s filename=%s", job_id, backend, filename)
     try:
         if _PIPELINE_IMPORT_ERROR:
             raise RuntimeError(_PIPELINE_IMPORT_ERROR)
-        out_root = os.path.join("outputs", "web", job_id)
+        out_root = os.path.join(_OUTPUT_ROOT, job_id)
         os.makedirs(out_root, exist_ok=True)
-        metrics, pdf_path = process_call(upload_path, out_root, backend=backend)
+        callbacks = {"progress": lambda stage, percent: _set_job(job_id, progress={"stage": stage, "percent": percent})}
+        if preview:
+            callbacks["preview"] = lambda metrics: _set_job(job_id, preview=_preview_summary(metrics))
+        supervisor = None
+        if isolation_enabled():
+            (metrics, pdf_path), supervisor = run_isolated(
+                process_call,
+                {"input_path": upload_path, "out_root": out_root, "backend": backend},
+                callbacks=callbacks,
+            )
+        else:
+            metrics, pdf_path = process_call(upload_path, out_root, backend=backend, **callbacks)
         json_path = metrics.get("output_json_path") if isinstance(metrics, dict) else None
         if not (os.path.exists(pdf_path) and os.path.exists(json_path)):
             raise RuntimeError("Expected output files not found.")
@@ -83,12 +178,16 @@ def _run_analysis(job_id, upload_path, backend, filename):
             output_dir=str(Path(pdf_path).parent),
             pdf_path=pdf_path,
             json_path=json_path,
+            duplicate_of=metrics.get("duplicate_of"),
+            routing=metrics.get("routing"),
+            resources=dict(metrics.get("resources") or {}, supervisor=supervisor),
+            preview=None,
             error=None,
         )
         _LOG.info("job_done job_id=%s backend=%s filename=%s", job_id, backend, filename)
     except Exception as exc:
         err_msg = str(exc)
-        openai_error = None
+        openai_error = getattr(exc, "openai_error", None)
         if OpenAITranscriptionError and isinstance(exc, OpenAITranscriptionError):
             openai_error = {
                 "class_name": exc.class_name,
@@ -101,17 +200,20 @@ def _run_analysis(job_id, upload_path, backend, filename):
                 "OpenAI transcription failed (check OPENAI_API_KEY/network). "
                 "Fallback to faster-whisper was unavailable."
             )
-        _set_job(job_id, status="error", error=err_msg, openai_error=openai_error)
+        _set_job(job_id, status="error", error=err_msg, openai_error=openai_error, resources=getattr(exc, "resources", None))
         _LOG.error("job_error job_id=%s backend=%s filename=%s error=%s", job_id, backend, filename, err_msg)
+    finally:
+        clear_running(os.path.dirname(upload_path))
 
 
 @app.post("/analyze")
 async def analyze(
     file: UploadFile = File(...),
     backend: str = Form("faster"),
+    preview: bool = Form(False),
 ):
     if backend not in _ALLOWED_BACKENDS:
-        raise HTTPException(status_code=400, detail="Invalid backend. Use 'faster' or 'openai'.")
+        raise HTTPException(status_code=400, detail="Invalid backend. Use 'faster', 'openai' or 'auto'.")
     original_name = os.path.basename(file.filename or "")
     if not original_name:
         raise HTTPException(status_code=400, detail="Filename is required.")
@@ -124,7 +226,7 @@ async def analyze(
         raise HTTPException(status_code=400, detail="Uploaded file is empty.")
 
     job_id = str(uuid4())
-    upload_dir = os.path.join("uploads", job_id)
+    upload_dir = os.path.join(_UPLOAD_ROOT, job_id)
     os.makedirs(upload_dir, exist_ok=True)
     upload_path = os.path.join(upload_dir, original_name)
     with open(upload_path, "wb") as f:
@@ -137,11 +239,18 @@ async def analyze(
             "status": "uploaded",
             "filename": original_name,
             "backend": backend,
+            "upload_path": upload_path,
             "created_at": created_at,
             "updated_at": created_at,
+            "version": 0,
+            "progress": None,
             "output_dir": None,
             "pdf_path": None,
             "json_path": None,
+            "duplicate_of": None,
+            "routing": None,
+            "resources": None,
+            "preview": None,
             "openai_error": None,
             "error": None,
         }
@@ -176,7 +285,8 @@ async def analyze(
                 detail={"message": f"faster-whisper import failed: {faster_error}", "job_id": job_id},
             )
 
-    _EXECUTOR.submit(_run_analysis, job_id, upload_path, backend, original_name)
+    mark_running(upload_dir)
+    _EXECUTOR.submit(_run_analysis, job_id, upload_path, backend, original_name, preview)
 
     return {
         "job_id": job_id,
@@ -186,34 +296,185 @@ async def analyze(
     }
 
 
-@app.get("/jobs/{job_id}")
-def get_job(job_id: str):
+def _run_reanalyze(job_id, force):
+    _set_job(job_id, status="running")
+    _LOG.info("reanalyze_start job_id=%s force=%s", job_id, force)
+    try:
+        from sales_call_analyzer.reanalyze import reanalyze_all
+
+        workers = int(os.getenv("REANALYZE_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+        summary, errors = reanalyze_all(_OUTPUT_ROOT, workers=workers, force=force)
+        _set_job(job_id, status="done", result={"summary": summary, "errors": errors[:50]}, error=None)
+        _LOG.info("reanalyze_done job_id=%s summary=%s", job_id, summary)
+    except Exception as exc:
+        _set_job(job_id, status="error", error=str(exc))
+        _LOG.error("reanalyze_error job_id=%s error=%s", job_id, exc)
+
+
+@app.post("/reanalyze")
+def reanalyze(force: bool = Form(False)):
+    if _PIPELINE_IMPORT_ERROR:
+        raise HTTPException(status_code=400, detail=f"Pipeline import failed: {_PIPELINE_IMPORT_ERROR}")
+    job_id = str(uuid4())
+    created_at = _now_iso()
     with _JOB_LOCK:
-        job = _JOB_STORE.get(job_id)
+        _JOB_STORE[job_id] = {
+            "job_id": job_id,
+            "kind": "reanalyze",
+            "status": "uploaded",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "version": 0,
+            "result": None,
+            "error": None,
+        }
+    _REANALYZE_EXECUTOR.submit(_run_reanalyze, job_id, force)
+    return {"job_id": job_id, "status": "uploaded", "kind": "reanalyze"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0.0, if_none_match: Optional[str] = Header(None)):
+    job = _get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found.")
-    return job
+    etag = _job_etag(job)
+    if if_none_match == etag and wait > 0 and job.get("status") not in _TERMINAL_STATUSES:
+        queue = _EVENTS.subscribe(job_id)
+        try:
+            job = _get_job(job_id) or job
+            if _job_etag(job) == etag:
+                job = await _EVENTS.next(queue, min(wait, _MAX_WAIT_SEC)) or job
+        finally:
+            _EVENTS.unsubscribe(job_id, queue)
+        etag = _job_etag(job)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(job, headers={"ETag": etag})
+
+
+def _sse_message(job):
+    return f"id: {job.get('version', 0)}\nevent: job\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    if not _get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def stream():
+        queue = _EVENTS.subscribe(job_id)
+        try:
+            job = _get_job(job_id)
+            yield _sse_message(job)
+            while job.get("status") not in _TERMINAL_STATUSES:
+                update = await _EVENTS.next(queue, _SSE_KEEPALIVE_SEC)
+                if update is None:
+                    yield ": keepalive\n\n"
+                    continue
+                job = update
+                yield _sse_message(job)
+        finally:
+            _EVENTS.unsubscribe(job_id, queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _export_entries(jobs, include):
+    entries = []
+    for job in jobs:
+        for kind in include:
+            path = _resolve_report(job.get(f"{kind}_path"))
+            if path:
+                entries.append((f"{job['job_id']}/{os.path.basename(path)}", path))
+    return entries
+
+
+@app.get("/export")
+def export_reports(
+    fmt: str = Query("zip", alias="format"),
+    status: str = "done",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    filename: Optional[str] = None,
+    after: Optional[str] = None,
+    include: str = "json,pdf",
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+):
+    if fmt not in ("zip", "tar", "jsonl"):
+        raise HTTPException(status_code=400, detail="Invalid format. Use 'zip', 'tar' or 'jsonl'.")
+    kinds = [k.strip() for k in include.split(",") if k.strip()]
+    if not kinds or any(k not in ("json", "pdf") for k in kinds):
+        raise HTTPException(status_code=400, detail="Invalid include. Use 'json', 'pdf' or 'json,pdf'.")
+    try:
+        jobs = bulk_export.select_jobs(
+            _jobs_snapshot().values(),
+            status=status or None,
+            since=bulk_export.parse_bound(since),
+            until=bulk_export.parse_bound(until, end=True),
+            filename=filename,
+            after=after,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {exc}")
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown job for 'after': {after}")
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    if fmt == "jsonl":
+        reports = [(job, path) for job in jobs for path in [_resolve_report(job.get("json_path"))] if path]
+        return StreamingResponse(
+            bulk_export.jsonl_stream(reports),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="reports_{stamp}.jsonl"'},
+        )
+
+    entries = _export_entries(jobs, kinds)
+    if fmt == "zip":
+        return StreamingResponse(
+            bulk_export.zip_stream(entries),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="reports_{stamp}.zip"'},
+        )
+
+    tar = bulk_export.TarStream(entries)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": tar.etag,
+        "Content-Disposition": f'attachment; filename="reports_{stamp}.tar"',
+    }
+    if if_range and if_range != tar.etag:
+        range_header = None
+    try:
+        byte_range = bulk_export.parse_range(range_header, tar.length)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{tar.length}", **headers})
+    if byte_range is None:
+        headers["Content-Length"] = str(tar.length)
+        return StreamingResponse(tar.iter_range(), media_type="application/x-tar", headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{tar.length}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(tar.iter_range(start, end), status_code=206, media_type="application/x-tar", headers=headers)
 
 
 @app.get("/download/{job_id}/report.pdf")
 def download_pdf(job_id: str):
-    with _JOB_LOCK:
-        job = _JOB_STORE.get(job_id)
+    job = _get_job(job_id)
     if not job or job.get("status") != "done":
         raise HTTPException(status_code=404, detail="Report not available.")
-    pdf_path = job.get("pdf_path")
-    if not pdf_path or not os.path.exists(pdf_path):
+    pdf_path = _resolve_report(job.get("pdf_path"))
+    if not pdf_path:
         raise HTTPException(status_code=404, detail="Report not found.")
-    return FileResponse(pdf_path, media_type="application/pdf", filename="report.pdf")
+    return _report_response(pdf_path, "application/pdf", "report.pdf")
 
 
 @app.get("/download/{job_id}/report.json")
 def download_json(job_id: str):
-    with _JOB_LOCK:
-        job = _JOB_STORE.get(job_id)
+    job = _get_job(job_id)
     if not job or job.get("status") != "done":
         raise HTTPException(status_code=404, detail="Report not available.")
-    json_path = job.get("json_path")
-    if not json_path or not os.path.exists(json_path):
+    json_path = _resolve_report(job.get("json_path"))
+    if not json_path:
         raise HTTPException(status_code=404, detail="Report not found.")
-    return FileResponse(json_path, media_type="application/json", filename="report.json")
+    return _report_response(json_path, "application/json", "report.json")
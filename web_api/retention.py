@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from web_api.audio_utils import transcode_to_opus
+
+_LOG = logging.getLogger("web_api.retention")
+_ACTIVE_STATUSES = {"uploaded", "running"}
+RUNNING_MARKER = ".running"
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def policy_from_env() -> Dict[str, float]:
+    day = 86400.0
+    return {
+        "interval_sec": _env_float("RETENTION_INTERVAL_SEC", 600.0),
+        "upload_transcode_after_sec": _env_float("RETENTION_UPLOAD_TRANSCODE_AFTER_SEC", 3600.0),
+        "upload_ttl_sec": _env_float("RETENTION_UPLOAD_TTL_SEC", 30 * day),
+        "report_gzip_after_sec": _env_float("RETENTION_REPORT_GZIP_AFTER_SEC", 7 * day),
+        "report_ttl_sec": _env_float("RETENTION_REPORT_TTL_SEC", 180 * day),
+        "disk_high_watermark": _env_float("RETENTION_DISK_HIGH_WATERMARK", 0.90),
+        "disk_low_watermark": _env_float("RETENTION_DISK_LOW_WATERMARK", 0.80),
+        "io_bytes_per_sec": _env_float("RETENTION_IO_BYTES_PER_SEC", 8 * 1024 * 1024),
+    }
+
+
+class _Throttle:
+    def __init__(self, bytes_per_sec: float) -> None:
+        self.bytes_per_sec = bytes_per_sec
+        self._next = time.monotonic()
+
+    def consume(self, nbytes: int) -> None:
+        if self.bytes_per_sec <= 0:
+            return
+        now = time.monotonic()
+        self._next = max(self._next, now) + nbytes / self.bytes_per_sec
+        delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _age(path: Path, now: float) -> float:
+    try:
+        return now - path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _files(root: Path) -> Iterable[Path]:
+    if not root.is_dir():
+        return []
+    return (p for p in root.rglob("*") if p.is_file())
+
+
+def mark_running(job_dir: str) -> None:
+    with open(os.path.join(job_dir, RUNNING_MARKER), "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+
+
+def clear_running(job_dir: str) -> None:
+    try:
+        os.unlink(os.path.join(job_dir, RUNNING_MARKER))
+    except FileNotFoundError:
+        pass
+
+
+def is_running(job_dir: Path) -> bool:
+    """True while any API process on this host is working on the job (the marker names its pid)."""
+    try:
+        pid = int((job_dir / RUNNING_MARKER).read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def disk_usage_fraction(path: str) -> float:
+    usage = shutil.disk_usage(path)
+    return usage.used / usage.total if usage.total else 0.0
+
+
+class RetentionManager:
+    def __init__(
+        self,
+        uploads_root: str,
+        outputs_root: str,
+        get_jobs: Callable[[], Dict[str, dict]],
+        update_job: Callable[..., None],
+        policy: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.uploads_root = Path(uploads_root)
+        self.outputs_root = Path(outputs_root)
+        self.get_jobs = get_jobs
+        self.update_job = update_job
+        self.policy = policy or policy_from_env()
+        self._throttle = _Throttle(self.policy["io_bytes_per_sec"])
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                _LOG.error("retention_error error=%s", exc)
+            self._stop.wait(self.policy["interval_sec"])
+
+    def _idle_job_ids(self) -> List[str]:
+        # The in-memory job store only covers this process; other API workers' jobs are
+        # recognised by the running marker they leave in the upload directory.
+        jobs = self.get_jobs()
+        active = {jid for jid, job in jobs.items() if job.get("status") in _ACTIVE_STATUSES}
+        ids = set()
+        for root in (self.uploads_root, self.outputs_root):
+            if root.is_dir():
+                ids.update(p.name for p in root.iterdir() if p.is_dir())
+        active.update(jid for jid in ids if is_running(self.uploads_root / jid))
+        return sorted(ids - active)
+
+    def run_once(self) -> Dict[str, int]:
+        now = time.time()
+        stats = {"transcoded": 0, "gzipped": 0, "deleted": 0}
+        job_ids = self._idle_job_ids()
+        for job_id in job_ids:
+            stats["deleted"] += self._expire(job_id, now)
+            stats["transcoded"] += self._transcode_uploads(job_id, now)
+            stats["gzipped"] += self._gzip_reports(job_id, now)
+        stats["deleted"] += self._enforce_watermarks(job_ids)
+        if any(stats.values()):
+            _LOG.info("retention_pass %s", " ".join(f"{k}={v}" for k, v in stats.items()))
+        return stats
+
+    def _transcode_uploads(self, job_id: str, now: float) -> int:
+        count = 0
+        for path in list(_files(self.uploads_root / job_id)):
+            if path.name == RUNNING_MARKER or path.suffix.lower() == ".opus":
+                continue
+            if _age(path, now) < self.policy["upload_transcode_after_sec"]:
+                continue
+            self._throttle.consume(path.stat().st_size)
+            try:
+                out = transcode_to_opus(path, path.with_suffix(".opus"))
+            except RuntimeError as exc:
+                _LOG.warning("retention_transcode_failed job_id=%s path=%s error=%s", job_id, path, exc)
+                continue
+            path.unlink()
+            self.update_job(job_id, upload_path=str(out))
+            count += 1
+        return count
+
+    def _gzip_reports(self, job_id: str, now: float) -> int:
+        count = 0
+        for path in list(_files(self.outputs_root / job_id)):
+            if not path.name.startswith("report.") or path.suffix == ".gz":
+                continue
+            if _age(path, now) < self.policy["report_gzip_after_sec"]:
+                continue
+            gz_path = path.with_name(path.name + ".gz")
+            with open(path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+                while True:
+                    chunk = src.read(256 * 1024)
+                    if not chunk:
+                        break
+                    self._throttle.consume(len(chunk))
+                    dst.write(chunk)
+            path.unlink()
+            if path.name == "report.json":
+                self.update_job(job_id, json_path=str(gz_path))
+            elif path.name == "report.pdf":
+                self.update_job(job_id, pdf_path=str(gz_path))
+            count += 1
+        return count
+
+    def _expire(self, job_id: str, now: float) -> int:
+        count = 0
+        for root, ttl_key in ((self.uploads_root, "upload_ttl_sec"), (self.outputs_root, "report_ttl_sec")):
+            job_dir = root / job_id
+            if job_dir.is_dir() and _age(job_dir, now) >= self.policy[ttl_key]:
+                count += self._delete_dir(job_id, job_dir)
+        return count
+
+    def _enforce_watermarks(self, job_ids: List[str]) -> int:
+        probe = self.uploads_root if self.uploads_root.exists() else Path(".")
+        if disk_usage_fraction(str(probe)) < self.policy["disk_high_watermark"]:
+            return 0
+        dirs = []
+        for job_id in job_ids:
+            for root in (self.uploads_root, self.outputs_root):
+                if (root / job_id).is_dir():
+                    dirs.append(((root / job_id).stat().st_mtime, job_id, root / job_id))
+        dirs.sort()
+        count = 0
+        for _, job_id, job_dir in dirs:
+            if disk_usage_fraction(str(probe)) <= self.policy["disk_low_watermark"]:
+                break
+            count += self._delete_dir(job_id, job_dir)
+        return count
+
+    def _delete_dir(self, job_id: str, job_dir: Path) -> int:
+        self._throttle.consume(4096 * sum(1 for _ in _files(job_dir)))
+        shutil.rmtree(job_dir, ignore_errors=True)
+        if job_dir.parent == self.uploads_root:
+            self.update_job(job_id, upload_path=None)
+        else:
+            self.update_job(job_id, status="expired", output_dir=None, pdf_path=None, json_path=None)
+        _LOG.info("retention_delete job_id=%s path=%s", job_id, job_dir)
+        return 1
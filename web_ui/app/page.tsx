@@ -6,13 +6,23 @@ type Job = {
   job_id: string;
   status: string;
   error?: string | null;
+  progress?: { stage: string; percent: number | null } | null;
+  preview?: Preview | null;
+};
+
+type Preview = {
+  engagement?: { engagement_rating?: number; client_talk_percent?: number };
+  sentiment?: { positivity_score?: number };
+  recommendations?: string[];
+  preview: { model: string; duration_sec: number; sampled_sec: number };
 };
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE || 'http://localhost:8000';
 
 export default function Home() {
   const [file, setFile] = useState<File | null>(null);
-  const [backend, setBackend] = useState<'faster' | 'openai'>('openai');
+  const [backend, setBackend] = useState<'faster' | 'openai' | 'auto'>('openai');
+  const [quickLook, setQuickLook] = useState(false);
   const [job, setJob] = useState<Job | null>(null);
   const [isUploading, setIsUploading] = useState(false);
   const [polling, setPolling] = useState(false);
@@ -33,24 +43,25 @@ export default function Home() {
 
   useEffect(() => {
     if (!jobId || !polling) return;
-    const interval = setInterval(async () => {
-      try {
-        const res = await fetch(`${API_BASE}/jobs/${jobId}`);
-        const data = await res.json();
-        setJob(data);
-        if (data.status === 'done' || data.status === 'error') {
-          setPolling(false);
-        }
-      } catch (err) {
+    const source = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+    source.addEventListener('job', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setJob(data);
+      if (data.status === 'done' || data.status === 'error' || data.status === 'expired') {
+        source.close();
         setPolling(false);
-        setJob((prev) => ({
-          job_id: prev?.job_id || 'unknown',
-          status: 'error',
-          error: 'Failed to poll job status.'
-        }));
       }
-    }, 2000);
-    return () => clearInterval(interval);
+    });
+    source.onerror = () => {
+      source.close();
+      setPolling(false);
+      setJob((prev) => ({
+        job_id: prev?.job_id || 'unknown',
+        status: 'error',
+        error: 'Lost connection to job progress stream.'
+      }));
+    };
+    return () => source.close();
   }, [jobId, polling]);
 
   const onAnalyze = async () => {
@@ -61,6 +72,7 @@ export default function Home() {
       const form = new FormData();
       form.append('file', file);
       form.append('backend', backend);
+      form.append('preview', quickLook ? 'true' : 'false');
 
       const res = await fetch(`${API_BASE}/analyze`, {
         method: 'POST',
@@ -106,13 +118,19 @@ export default function Home() {
         <label style={styles.label}>Backend</label>
         <select
           value={backend}
-          onChange={(e) => setBackend(e.target.value as 'faster' | 'openai')}
+          onChange={(e) => setBackend(e.target.value as 'faster' | 'openai' | 'auto')}
           style={styles.select}
         >
           <option value="faster">faster</option>
           <option value="openai">openai</option>
+          <option value="auto">auto</option>
         </select>
 
+        <label style={styles.checkbox}>
+          <input type="checkbox" checked={quickLook} onChange={(e) => setQuickLook(e.target.checked)} />
+          Quick-look preview while the full analysis runs
+        </label>
+
         <button
           onClick={onAnalyze}
           disabled={!file || isUploading}
@@ -130,6 +148,22 @@ export default function Home() {
             <div style={styles.statusDetails}>
               <div><strong>job_id:</strong> {job.job_id}</div>
               <div><strong>status:</strong> {job.status}</div>
+              {job.status === 'running' && job.progress ? (
+                <div>
+                  <strong>stage:</strong> {job.progress.stage}
+                  {job.progress.percent != null ? ` (${Math.round(job.progress.percent)}%)` : ''}
+                </div>
+              ) : null}
+              {job.preview && status !== 'done' ? (
+                <div style={styles.previewBox}>
+                  <strong>Preview</strong> (provisional, {Math.round(job.preview.preview.sampled_sec / 60)} of{' '}
+                  {Math.round(job.preview.preview.duration_sec / 60)} min sampled, {job.preview.preview.model} model)
+                  <div>engagement: {job.preview.engagement?.engagement_rating ?? '-'}/100</div>
+                  <div>client talk: {job.preview.engagement?.client_talk_percent ?? '-'}%</div>
+                  <div>positivity: {job.preview.sentiment?.positivity_score ?? '-'}</div>
+                  {job.preview.recommendations?.length ? <div>{job.preview.recommendations[0]}</div> : null}
+                </div>
+              ) : null}
               {job.error ? (
                 <div style={styles.errorBox}>{job.error}</div>
               ) : null}
@@ -195,6 +229,14 @@ const styles: Record<string, React.CSSProperties> = {
     padding: '8px',
     marginBottom: '16px'
   },
+  checkbox: {
+    display: 'flex',
+    alignItems: 'center',
+    gap: '8px',
+    fontSize: '14px',
+    marginBottom: '16px',
+    color: '#333'
+  },
   button: {
     width: '100%',
     padding: '10px 12px',
@@ -225,6 +267,16 @@ const styles: Record<string, React.CSSProperties> = {
     marginTop: '12px',
     color: '#888'
   },
+  previewBox: {
+    marginTop: '8px',
+    padding: '10px',
+    backgroundColor: '#f3f6fb',
+    border: '1px dashed #9fb3d1',
+    borderRadius: '6px',
+    display: 'flex',
+    flexDirection: 'column',
+    gap: '4px'
+  },
   errorBox: {
     marginTop: '8px',
     padding: '10px',